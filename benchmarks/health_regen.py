@@ -0,0 +1,95 @@
+"""Compares the old health regen loop (a full-table UPDATE every 32 seconds) with lazy regen from health_at
+
+Creates a scratch users table in the given (throwaway!) database, then measures the cost and table
+bloat of running the old loop for a simulated period, and the read cost of deriving health lazily.
+
+Usage: python -m benchmarks.health_regen <dsn> [users] [injured fraction]
+"""
+
+import asyncio
+import sys
+import time
+
+import asyncpg
+
+TABLE = "health_regen_bench_users"
+SIMULATED_TICKS = 112  # an hour of the old loop, which ran every 32 seconds
+
+TABLE_STATS = f"""SELECT pg_total_relation_size('{TABLE}') AS size, n_tup_upd, n_dead_tup
+FROM pg_stat_user_tables WHERE relname = '{TABLE}'"""
+
+
+async def setup_table(con: asyncpg.Connection, users: int, injured: float) -> None:
+    await con.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await con.execute(
+        f"""CREATE TABLE {TABLE} (
+  user_id            BIGINT PRIMARY KEY,
+  emeralds           BIGINT NOT NULL DEFAULT 0,
+  health             SMALLINT NOT NULL DEFAULT 20,
+  health_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) WITH (autovacuum_enabled = false)"""
+    )
+    await con.execute(
+        f"INSERT INTO {TABLE} (user_id, health, health_at) SELECT i, CASE WHEN random() < $1 THEN 0 ELSE 20 END, NOW() FROM GENERATE_SERIES(1, $2) i",
+        injured,
+        users,
+    )
+    await con.execute(f"ANALYZE {TABLE}")
+
+
+async def report(con: asyncpg.Connection, label: str) -> None:
+    await asyncio.sleep(1)  # table stats are reported asynchronously by the backends
+    stats = await con.fetchrow(TABLE_STATS)
+
+    print(
+        f"{label:<28} size: {stats['size'] / 1024 / 1024:>8.1f} MiB  updated rows: {stats['n_tup_upd']:>10}"
+        f"  dead rows: {stats['n_dead_tup']:>10}"
+    )
+
+
+async def main(dsn: str, users: int, injured: float) -> None:
+    con = await asyncpg.connect(dsn)
+
+    try:
+        print(f"users: {users}, injured: {injured:.0%}")
+
+        # old: the loop rewrites every injured row each tick until they're healed
+        await setup_table(con, users, injured)
+        await report(con, "initial")
+
+        start = time.perf_counter()
+        for _ in range(SIMULATED_TICKS):
+            await con.execute(f"UPDATE {TABLE} SET health = health + 1 WHERE health < 20")
+        elapsed = time.perf_counter() - start
+
+        print(f"old loop: {elapsed / SIMULATED_TICKS * 1000:.2f} ms per tick")
+        await report(con, f"after {SIMULATED_TICKS} ticks")
+
+        # new: nothing is written, health is derived when a user is loaded
+        await setup_table(con, users, injured)
+
+        start = time.perf_counter()
+        for user_id in range(1, 10_001):
+            await con.fetchrow(f"SELECT * FROM {TABLE} WHERE user_id = $1", user_id % users + 1)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"lazy regen: 0 writes, {elapsed / 10_000 * 1e6:.1f} us per user load (regen is computed in Python)"
+        )
+        await report(con, "after the same period")
+    finally:
+        await con.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await con.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+
+    asyncio.run(
+        main(
+            sys.argv[1],
+            int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000,
+            float(sys.argv[3]) if len(sys.argv) > 3 else 0.05,
+        )
+    )
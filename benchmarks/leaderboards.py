@@ -0,0 +1,72 @@
+"""Benchmarks the in-memory LeaderboardIndex against re-sorting the whole leaderboard per request
+
+Usage: python -m benchmarks.leaderboards [users]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from karen.utils.leaderboards import LeaderboardIndex
+
+
+def fetch_sorted(amounts: dict[int, int], user_id: int) -> list[tuple[int, int, int]]:
+    # equivalent of the old ROW_NUMBER() OVER(ORDER BY amount DESC) query
+    ordered = sorted(amounts.items(), key=(lambda e: (-e[1], e[0])))
+    rows = [(i, u, a) for i, (u, a) in enumerate(ordered[:10], start=1)]
+    rows.extend((i, u, a) for i, (u, a) in enumerate(ordered, start=1) if u == user_id and i > 10)
+    return rows
+
+
+def fetch_index(index: LeaderboardIndex, user_id: int) -> list[tuple[int, int, int]]:
+    rows = [(i, u, a) for i, (u, a) in enumerate(index.top(10), start=1)]
+
+    rank = index.rank(user_id)
+    if rank is not None and rank > 10:
+        rows.append((rank, user_id, index.get(user_id)))
+
+    return rows
+
+
+def timeit(label: str, n: int, func) -> None:
+    start = time.perf_counter()
+
+    for _ in range(n):
+        func()
+
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / n * 1e6:>12.2f} us/op  ({n} ops)")
+
+
+def main(users: int) -> None:
+    rng = random.Random(0)
+    user_ids = [rng.getrandbits(60) for _ in range(users)]
+    amounts = {user_id: int(rng.paretovariate(1.2) * 10) for user_id in user_ids}
+
+    print(f"users: {users}")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = LeaderboardIndex(amounts.items())
+    build_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{'build index':<40} {build_time:>12.2f} s  ({memory / 1024 / 1024:.1f} MiB)")
+
+    assert fetch_index(index, user_ids[-1]) == fetch_sorted(amounts, user_ids[-1])
+
+    def update() -> None:
+        user_id = rng.choice(user_ids)
+        amounts[user_id] += 1
+        index.add(user_id, 1)
+
+    timeit("index: add", 100_000, update)
+    timeit("index: rank", 100_000, lambda: index.rank(rng.choice(user_ids)))
+    timeit("index: fetch top 10 + user", 100_000, lambda: fetch_index(index, rng.choice(user_ids)))
+    timeit("full sort: fetch top 10 + user", 5, lambda: fetch_sorted(amounts, rng.choice(user_ids)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
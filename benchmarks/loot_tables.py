@@ -0,0 +1,80 @@
+"""Benchmarks draws from the precomputed loot tables against the rolls the econ commands used to do
+
+Usage: python -m benchmarks.loot_tables
+"""
+
+import random
+import time
+from typing import Callable
+
+from common.utils.setup import load_data
+
+d = load_data()
+
+
+def old_mine(lucky: bool):
+    for item in d.mining.findables:
+        if random.randint(0, item.rarity) == 1 or (lucky and random.randint(0, item.rarity) < 3):
+            return item
+
+    return None
+
+
+def old_until_found(findables):
+    while True:
+        for item in findables:
+            if random.randint(0, (item.rarity // 2) + 2) == 1:
+                return item
+
+
+def old_barrel():
+    for _ in range(20):
+        for item in d.mining.findables:
+            if item.rarity > 1000 and random.randint(0, int(item.rarity // 1.5) + 5) == 1:
+                return item
+
+    return None
+
+
+def old_yield(pickaxe: str):
+    yield_ = d.mining.yields_pickaxes[pickaxe]
+    return random.choice([True] * yield_[0] + [False] * yield_[1])
+
+
+def draws_per_second(func: Callable[[], object], seconds: float = 1.0) -> float:
+    draws = 0
+    start = time.perf_counter()
+
+    while (elapsed := time.perf_counter() - start) < seconds:
+        for _ in range(100):
+            func()
+
+        draws += 100
+
+    return draws / elapsed
+
+
+BENCHMARKS = {
+    "mine": (lambda: old_mine(False), lambda: d.mining.draw_findable(False)),
+    "mine (lucky)": (lambda: old_mine(True), lambda: d.mining.draw_findable(True)),
+    "mine emeralds": (lambda: old_yield("Pico de Oro"), lambda: d.mining.draw_yield("Pico de Oro")),
+    "present": (lambda: old_until_found(d.mining.findables), d.mining.draw_present),
+    "barrel": (old_barrel, d.mining.draw_barrel),
+    "fishing item": (lambda: old_until_found(d.fishing.findables), d.fishing.draw_findable),
+    "fish": (
+        lambda: random.choices(d.fishing.fish_ids, d.fishing.fishing_weights)[0],
+        d.fishing.draw_fish,
+    ),
+}
+
+
+def main() -> None:
+    print(f"{'':<16} {'old draws/s':>14} {'new draws/s':>14} {'speedup':>10}")
+
+    for name, (old, new) in BENCHMARKS.items():
+        old_rate, new_rate = draws_per_second(old), draws_per_second(new)
+        print(f"{name:<16} {old_rate:>14,.0f} {new_rate:>14,.0f} {new_rate / old_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
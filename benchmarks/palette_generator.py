@@ -0,0 +1,96 @@
+"""Benchmarks the palette generator against the per-pixel loops it used to run on every texture
+
+Point it at the block textures of a resource pack, e.g. assets/minecraft/textures/block from an
+extracted Minecraft client jar.
+
+Usage: python -m benchmarks.palette_generator <textures dir> [resolution]
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+import cv2
+
+from bot.data.blockifier_generator import Palette
+
+
+def old_pal_from_image(path: str, resolution: int):
+    """What Palette.pal_from_image used to do for each texture"""
+
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+
+    if img is None:
+        return False
+
+    if img.shape[2] == 4:
+        for row in img:
+            for pixel in row:
+                if pixel[3] < 255:
+                    return False
+
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+
+    if img.shape[1] != resolution or img.shape[0] != resolution:
+        return False
+
+    p_count = 0
+    avgs = [0] * img.shape[2]
+
+    for row in img:
+        for pixel in row:
+            for i in range(img.shape[2]):
+                avgs[i] += pixel[i]
+
+            p_count += 1
+
+    for i in range(img.shape[2]):
+        avgs[i] /= p_count
+
+    b = base64.b64encode(cv2.imencode(".png", img)[1]).decode("utf-8")
+
+    return (
+        [[int(avg / 128) for avg in avgs], path],
+        [[int(avg / 64) for avg in avgs], path],
+        [[int(avg / 32) for avg in avgs], path],
+        {path: b},
+    )
+
+
+def _old_pal_from_image(args: tuple[str, int]):
+    return old_pal_from_image(*args)
+
+
+def main(source_dir: str, resolution: int) -> None:
+    palette = Palette(resolution=resolution, source_dir=source_dir)
+    image_files = palette.find_images()
+
+    print(f"{len(image_files)} textures, {palette.workers} workers")
+
+    start = time.perf_counter()
+    with Pool(8) as pool:
+        pool.map(
+            _old_pal_from_image, [(os.path.join(source_dir, f), resolution) for f in image_files]
+        )
+    print(f"{'old (per-pixel loops, 8 processes)':<40} {time.perf_counter() - start:>8.2f}s")
+
+    start = time.perf_counter()
+    palette.generate()
+    generated = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        palette.save(os.path.join(tmp, "atlas.npy"), os.path.join(tmp, "lut.npy"))
+
+    print(f"{'new (load tiles)':<40} {generated - start:>8.2f}s")
+    print(f"{'new (lab colors + lut + save)':<40} {time.perf_counter() - generated:>8.2f}s")
+    print(f"{len(palette.tile_names)} usable tiles")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 16)
@@ -0,0 +1,216 @@
+"""Runs every query in the Database cog and Karen against synthetic data with EXPLAIN ANALYZE
+
+Loads setup.sql and production-scale synthetic data into the given (throwaway!) database, then reports
+the timing of each query along with any sequential scans over large tables, which usually point to a
+missing index.
+
+Usage: python -m benchmarks.query_audit <dsn> [users] [--verbose]
+"""
+
+import ast
+import asyncio
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import arrow
+import asyncpg
+
+SOURCES = [Path("bot/cogs/core/database.py"), Path("karen/karen.py")]
+DB_METHODS = {"execute", "executemany", "fetch", "fetchrow", "fetchval", "cursor"}
+
+SEQ_SCAN_ROWS_THRESHOLD = 10_000  # sequential scans over tables larger than this are reported
+
+SAMPLE_USER_ID = 1  # the user which all generated data is centered around
+SAMPLE_ITEM = "Diamond"
+
+# synthetic data, :users is replaced with the amount of users, rows are spread over users with random()
+# (floored, as casting rounds and could produce an id 1 past the last user or guild)
+SYNTHETIC_DATA = [
+    "INSERT INTO users (user_id, emeralds, bot_banned) SELECT i, (random() * 100000)::BIGINT, random() < 0.001 FROM GENERATE_SERIES(1, :users) i",
+    "INSERT INTO leaderboards (user_id, commands, mobs_killed) SELECT i, (random() * 10000)::BIGINT, (random() * 1000)::BIGINT FROM GENERATE_SERIES(1, :users) i",
+    """INSERT INTO items (user_id, name, sell_price, amount, sticky, sellable)
+SELECT u, n, 1, (random() * 64)::BIGINT + 1, false, true FROM GENERATE_SERIES(1, :users) u,
+UNNEST(ARRAY['Diamond', 'Emerald Block', 'Bone Meal', 'Rich Person Trophy', 'Pickaxe', 'Sword', 'Hoe', 'Wheat']) n WHERE random() < 0.6""",
+    "INSERT INTO give_logs (item, amount, at, sender, receiver) SELECT 'emerald', 10, NOW() - random() * INTERVAL '365 DAYS', FLOOR(random() * :users)::BIGINT + 1, FLOOR(random() * :users)::BIGINT + 1 FROM GENERATE_SERIES(1, :users * 5)",
+    "INSERT INTO farm_plots (user_id, crop_type, planted_at, grow_time) SELECT FLOOR(random() * :users)::BIGINT + 1, 'wheat', NOW() - random() * INTERVAL '2 DAYS', INTERVAL '1 DAY' FROM GENERATE_SERIES(1, :users * 3)",
+    # trash_can is keyed by (user_id, item), so every user gets at most one row per item
+    """INSERT INTO trash_can (user_id, item, value, amount)
+SELECT u, n, 0.1, FLOOR(random() * 10)::BIGINT + 1 FROM GENERATE_SERIES(1, :users) u,
+UNNEST(ARRAY['Dirt', 'Cobblestone', 'Rotten Flesh']) n WHERE random() < 0.3""",
+    "INSERT INTO reminders (user_id, channel_id, message_id, reminder, at) SELECT FLOOR(random() * :users)::BIGINT + 1, 1, 1, 'reminder', NOW() + random() * INTERVAL '30 DAYS' FROM GENERATE_SERIES(1, :users / 10)",
+    "INSERT INTO guilds (guild_id, prefix, difficulty, language) SELECT i << 22, '!!', 'easy', 'es' FROM GENERATE_SERIES(1, :users / 20) i",
+    "INSERT INTO guild_members (guild_id, user_id) SELECT (FLOOR(random() * (:users / 20))::BIGINT + 1) << 22, i FROM GENERATE_SERIES(1, :users) i ON CONFLICT DO NOTHING",
+    "INSERT INTO guild_events (guild_id, event_type, member_count, total_count, event_at) SELECT i << 22, 1, 0, 0, NOW() - random() * INTERVAL '365 DAYS' FROM GENERATE_SERIES(1, :users / 20) i",
+    "INSERT INTO command_executions (user_id, guild_id, command, is_slash, at) SELECT FLOOR(random() * :users)::BIGINT + 1, (FLOOR(random() * (:users / 20))::BIGINT + 1) << 22, 'mine', false, NOW() - random() * INTERVAL '60 DAYS' FROM GENERATE_SERIES(1, :users * 10)",
+    """INSERT INTO command_executions_hourly (hour, guild_id, user_id, count)
+SELECT DATE_TRUNC('HOUR', at), COALESCE(guild_id, 0), user_id, COUNT(*) FROM command_executions GROUP BY 1, 2, 3""",
+    # make sure the sample user has a bit of everything
+    "INSERT INTO give_logs (item, amount, at, sender, receiver) SELECT 'emerald', 1, NOW(), 1, 2 FROM GENERATE_SERIES(1, 50)",
+    "INSERT INTO farm_plots (user_id, crop_type, planted_at, grow_time) SELECT 1, 'wheat', NOW() - INTERVAL '2 DAYS', INTERVAL '1 DAY' FROM GENERATE_SERIES(1, 50)",
+    "INSERT INTO guild_members (guild_id, user_id) VALUES (4194304, 1) ON CONFLICT DO NOTHING",
+    "ANALYZE",
+]
+
+
+def _string_value(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _string_value(node.left), _string_value(node.right)
+
+        if left is not None and right is not None:
+            return left + right
+
+    return None
+
+
+def extract_queries(path: Path) -> Iterator[tuple[int, str]]:
+    """Yields (line number, query) for every literal query passed to a database method"""
+
+    for node in ast.walk(ast.parse(path.read_text(), str(path))):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in DB_METHODS
+            and node.args
+        ):
+            continue
+
+        query = _string_value(node.args[0])
+
+        if query is None:
+            # f-strings (leaderboard queries) and non-literal queries can't be audited statically
+            continue
+
+        yield node.lineno, query
+
+
+def sample_value(type_name: str) -> Any:
+    if type_name.startswith("_"):  # array type
+        return [sample_value(type_name[1:])]
+
+    return {
+        "int2": 1,
+        "int4": 10,
+        "int8": SAMPLE_USER_ID,
+        "float4": 1.0,
+        "float8": 1.0,
+        "numeric": 1,
+        "bool": True,
+        "text": SAMPLE_ITEM,
+        "varchar": SAMPLE_ITEM,
+        "bpchar": SAMPLE_ITEM,
+        "timestamptz": datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=7),
+        "timestamp": datetime.datetime.utcnow() - datetime.timedelta(days=7),
+        "interval": datetime.timedelta(hours=1),
+    }[type_name]
+
+
+def walk_plan(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+
+    for child in plan.get("Plans", []):
+        yield from walk_plan(child)
+
+
+async def load_synthetic_data(con: asyncpg.Connection, users: int) -> None:
+    await con.execute(Path("setup.sql").read_text())
+
+    # partitions for the last couple months, like Karen would've created
+    month = arrow.utcnow().floor("month")
+    for start in (month.shift(months=i) for i in range(-2, 2)):
+        await con.execute(
+            f"CREATE TABLE IF NOT EXISTS command_executions_{start.format('YYYY_MM')} PARTITION OF command_executions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{start.shift(months=1).isoformat()}')"
+        )
+
+    for query in SYNTHETIC_DATA:
+        start_time = time.perf_counter()
+        await con.execute(query.replace(":users", str(users)))
+        print(f"{time.perf_counter() - start_time:>8.2f}s  {' '.join(query.split())[:90]}")
+
+
+async def explain(con: asyncpg.Connection, query: str) -> dict[str, Any]:
+    stmt = await con.prepare(query)
+    args = [sample_value(t.name) for t in stmt.get_parameters()]
+
+    # queries which modify data are rolled back so every query runs against the same data
+    tr = con.transaction()
+    await tr.start()
+
+    try:
+        result = await con.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args)
+    finally:
+        await tr.rollback()
+
+    return json.loads(result)[0]
+
+
+async def main(dsn: str, users: int, verbose: bool) -> None:
+    con = await asyncpg.connect(dsn)
+
+    try:
+        if await con.fetchval("SELECT to_regclass('users') IS NOT NULL"):
+            raise SystemExit("The database isn't empty, the audit needs a throwaway database")
+
+        print(f"loading synthetic data for {users} users...")
+        await load_synthetic_data(con, users)
+
+        table_sizes = {
+            r["relname"]: r["reltuples"]
+            for r in await con.fetch("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+        }
+
+        results = list[tuple[float, str, str, list[str], dict[str, Any]]]()
+
+        for path in SOURCES:
+            for lineno, query in extract_queries(path):
+                location = f"{path}:{lineno}"
+
+                try:
+                    explained = await explain(con, query)
+                except Exception as e:
+                    print(f"{location}: failed to explain query: {e!r}")
+                    continue
+
+                seq_scans = [
+                    node["Relation Name"]
+                    for node in walk_plan(explained["Plan"])
+                    if node["Node Type"] == "Seq Scan"
+                    and table_sizes.get(node["Relation Name"], 0) > SEQ_SCAN_ROWS_THRESHOLD
+                ]
+
+                results.append(
+                    (explained["Execution Time"], location, query, seq_scans, explained["Plan"])
+                )
+    finally:
+        await con.close()
+
+    print(f"\n{'ms':>10}  {'location':<32} seq scans over large tables / query")
+
+    for execution_time, location, query, seq_scans, plan in sorted(
+        results, key=(lambda r: r[0]), reverse=True
+    ):
+        print(
+            f"{execution_time:>10.2f}  {location:<32} {', '.join(seq_scans) or '-'}\n"
+            f"{'':>44}{' '.join(query.split())[:120]}"
+        )
+
+        if verbose:
+            print(json.dumps(plan, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+
+    if not args:
+        raise SystemExit(__doc__)
+
+    asyncio.run(
+        main(args[0], int(args[1]) if len(args) > 1 else 1_000_000, "--verbose" in sys.argv)
+    )
@@ -0,0 +1,93 @@
+"""Benchmarks loading the tiler and its vectorized engine against the per-pixel Cython loop it replaced
+
+Usage: python -m benchmarks.tiler
+"""
+
+import time
+
+import cv2
+import numpy as np
+import pyximport
+
+from bot.utils.tiler import Tiler
+from bot.utils.tiler_engine import LUT_BITS, build_lut, map_blocks, tile_colors
+
+pyximport.install(language_level=3, setup_args={"include_dirs": np.get_include()})
+
+from benchmarks.tiler_reference import convert_image_loop  # noqa: E402
+
+ATLAS_FILE = "bot/data/block_atlas.npy"
+LUT_FILE = "bot/data/block_lut.npy"
+
+
+def reference_palette(tiler: Tiler) -> tuple[dict, dict, dict, dict]:
+    """Rebuilds palette dicts for the old loop, every 3 bit color is in the oct palette"""
+
+    shift = LUT_BITS - 3
+    palette_oct = {
+        (c0, c1, c2): str(
+            tiler.lut[(c0 << (LUT_BITS * 2 + shift)) | (c1 << (LUT_BITS + shift)) | (c2 << shift)]
+        )
+        for c0 in range(8)
+        for c1 in range(8)
+        for c2 in range(8)
+    }
+    palette_map = {str(i): np.array(tile) for i, tile in enumerate(tiler.atlas)}
+
+    return {}, {}, palette_oct, palette_map
+
+
+def timeit(label: str, n: int, func) -> float:
+    start = time.perf_counter()
+
+    for _ in range(n):
+        func()
+
+    elapsed = (time.perf_counter() - start) / n
+    print(f"{label:<40} {elapsed * 1000:>10.2f} ms/op  ({n} ops)")
+
+    return elapsed
+
+
+def main() -> None:
+    timeit("load tiler", 100, lambda: Tiler(ATLAS_FILE, LUT_FILE))
+
+    tiler = Tiler(ATLAS_FILE, LUT_FILE)
+    timeit("build lut (palette generator)", 3, lambda: build_lut(tile_colors(tiler.atlas)))
+
+    lut, atlas, xi, yi = tiler.lut, tiler.atlas, tiler.xi, tiler.yi
+    palette_bi, palette_quad, palette_oct, palette_map = reference_palette(tiler)
+
+    rng = np.random.default_rng(0)
+
+    for size in (512, 1024):
+        # smooth gradients + noise, so it's a bit like a real photo
+        gradient = np.linspace(0, 255, size, dtype=np.float32)
+        image = np.stack(
+            [
+                gradient[None, :].repeat(size, 0),
+                gradient[:, None].repeat(size, 1),
+                255 - gradient[None, :].repeat(size, 0),
+            ],
+            axis=-1,
+        )
+        image = np.clip(image + rng.normal(0, 20, image.shape), 0, 255).astype(np.uint8)
+
+        # the same downscale Tiler.prep_image does before mapping
+        source = cv2.resize(image, (size // xi, size // yi))
+
+        print(f"\n{size}px input ({source.shape[1]}x{source.shape[0]} blocks)")
+
+        loop_time = timeit(
+            "cython loop",
+            5,
+            lambda: convert_image_loop(
+                source, palette_bi, palette_quad, palette_oct, palette_map, xi, yi
+            ),
+        )
+        vectorized_time = timeit("vectorized", 50, lambda: map_blocks(source, lut, atlas))
+        print(f"{'speedup':<40} {loop_time / vectorized_time:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
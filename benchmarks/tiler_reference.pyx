@@ -0,0 +1,53 @@
+# the per-pixel loop which Tiler._convert_image used before the vectorized engine, kept for benchmarks
+
+import random
+
+import numpy as np
+
+cimport numpy as np
+
+ctypedef np.uint8_t NPUINT8_t
+
+
+cdef void draw_image(np.ndarray[NPUINT8_t, ndim=3] canvas, np.ndarray[NPUINT8_t, ndim=3] img, signed int x, signed int y):
+    canvas[y : y + img.shape[0], x : x + img.shape[1]] = img
+
+
+cpdef np.ndarray convert_image_loop(
+    np.ndarray[NPUINT8_t, ndim=3] source,
+    dict palette_bi,
+    dict palette_quad,
+    dict palette_oct,
+    dict palette_map,
+    signed int xi,
+    signed int yi,
+):
+    cdef np.ndarray[NPUINT8_t, ndim=3] canvas = np.zeros((source.shape[0] * xi, source.shape[1] * yi, 3), np.uint8)
+
+    cdef signed int x = 0
+    cdef signed int y = 0
+    cdef np.ndarray row
+    cdef signed int b, g, r
+    cdef str pal_key
+
+    for row in source:
+        x = 0
+
+        for r, g, b in row:
+            pal_key = palette_oct.get((r // 32, g // 32, b // 32))
+
+            if pal_key is None:
+                pal_key = palette_quad.get((r // 64, g // 64, b // 64))
+
+                if pal_key is None:
+                    pal_key = palette_bi.get((r // 128, g // 128, b // 128))
+
+                    if pal_key is None:
+                        pal_key = palette_oct[random.choice(tuple(palette_oct.keys()))]
+
+            draw_image(canvas, palette_map[pal_key], x, y)
+
+            x += xi
+        y += yi
+
+    return canvas
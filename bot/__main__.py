@@ -5,7 +5,6 @@ import sys
 
 from common.utils.setup import load_data
 
-from bot.utils.add_cython_ext import add_cython_ext
 from bot.utils.setup import load_secrets, load_translations
 from bot.villager_bot import VillagerBotCluster
 
@@ -32,13 +31,10 @@ def main(args: list[str]) -> None:
         print("Villager Bot must be ran as a module (using the -m flag)")
         sys.exit(1)
 
-    add_cython_ext()
-
     if not os.path.exists("tmp"):
         os.mkdir("tmp")
 
-    if "--build-cython-only" not in args:
-        asyncio.run(main_async())
+    asyncio.run(main_async())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 
+from common.data.enums.cache_topic import CacheTopic
+
 from bot.cogs.core.database import Database
 from bot.utils.ctx import Ctx
 from bot.villager_bot import VillagerBotCluster
@@ -11,6 +13,7 @@ class Config(commands.Cog):
         self.bot = bot
 
         self.d = bot.d
+        self.karen = bot.karen
 
     @property
     def db(self) -> Database:
@@ -57,7 +60,7 @@ class Config(commands.Cog):
                 return
 
         await self.db.set_guild_attr(ctx.guild.id, "prefix", prefix)
-        self.bot.prefix_cache[ctx.guild.id] = prefix
+        await self.karen.publish_cache_invalidation(CacheTopic.GUILD_PREFIX, ctx.guild.id, prefix)
         await ctx.reply_embed(ctx.l.config.prefix.set.format(prefix))
 
     @config.command(name="respuestas")
@@ -75,16 +78,16 @@ class Config(commands.Cog):
 
         if replies.lower() in ("sí", "si", "activar"):
             await self.db.set_guild_attr(ctx.guild.id, "do_replies", True)
-            self.bot.replies_cache.add(ctx.guild.id)
+            await self.karen.publish_cache_invalidation(
+                CacheTopic.GUILD_REPLIES, ctx.guild.id, True
+            )
 
             await ctx.reply_embed(ctx.l.config.replies.set.format("on"))
         elif replies.lower() in ("no", "desactivar"):
             await self.db.set_guild_attr(ctx.guild.id, "do_replies", False)
-
-            try:
-                self.bot.replies_cache.remove(ctx.guild.id)
-            except KeyError:
-                pass
+            await self.karen.publish_cache_invalidation(
+                CacheTopic.GUILD_REPLIES, ctx.guild.id, False
+            )
 
             await ctx.reply_embed(ctx.l.config.replies.set.format("off"))
         else:
@@ -132,7 +135,9 @@ class Config(commands.Cog):
 
         if lang.lower() in lang_codes:
             await self.db.set_guild_attr(ctx.guild.id, "language", lang.replace("-", "_"))
-            self.bot.language_cache[ctx.guild.id] = lang.replace("-", "_")
+            await self.karen.publish_cache_invalidation(
+                CacheTopic.GUILD_LANGUAGE, ctx.guild.id, lang.replace("-", "_")
+            )
             ctx.l = self.bot.get_language(ctx)
             await ctx.reply_embed(ctx.l.config.lang.set.format(lang))
         else:
@@ -190,12 +195,16 @@ class Config(commands.Cog):
             return
 
         if cmd_true in disabled:
-            self.bot.disabled_commands[ctx.guild.id].remove(cmd_true)
             await self.db.set_cmd_usable(ctx.guild.id, cmd_true, True)
+            await self.karen.publish_cache_invalidation(
+                CacheTopic.GUILD_DISABLED_COMMANDS, ctx.guild.id, sorted(disabled - {cmd_true})
+            )
             await ctx.reply_embed(ctx.l.config.cmd.reenable.format(cmd_true))
         else:
-            self.bot.disabled_commands[ctx.guild.id].add(cmd_true)
             await self.db.set_cmd_usable(ctx.guild.id, cmd_true, False)
+            await self.karen.publish_cache_invalidation(
+                CacheTopic.GUILD_DISABLED_COMMANDS, ctx.guild.id, sorted(disabled | {cmd_true})
+            )
             await ctx.reply_embed(ctx.l.config.cmd.disable.format(cmd_true))
 
     @config.command(name="alertaregalo")
@@ -1,6 +1,5 @@
 import asyncio
 import datetime
-import functools
 import math
 import random
 from collections import defaultdict
@@ -52,11 +51,6 @@ class Econ(commands.Cog):
     def paginator(self) -> Paginator:
         return self.bot.get_cog("Paginator")
 
-    @functools.lru_cache(maxsize=None)  # calculate chances for a specific pickaxe to find emeralds
-    def calc_yield_chance_list(self, pickaxe: str):
-        yield_ = self.d.mining.yields_pickaxes[pickaxe]  # [xTrue, xFalse]
-        return [True] * yield_[0] + [False] * yield_[1]
-
     def _link_max_concurrency(self):
         # This links the max concurrency of the with, dep, sell, give, etc.. cmds
         for command in (
@@ -938,15 +932,12 @@ class Econ(commands.Cog):
         await ctx.reply_embed(ctx.l.econ.gamble.roll.format(u_roll, b_roll))
 
         if u_roll > b_roll:
-            multi = (
-                40
-                + random.randint(5, 30)
-                + (await self.db.fetch_item(ctx.author.id, "Amuleto del Pillager") is not None)
-                * 20
+            owned = await self.db.fetch_owned(
+                ctx.author.id, ["Amuleto del Pillager", "Trofeo de Dinero"]
             )
-            multi += (
-                await self.db.fetch_item(ctx.author.id, "Trofeo de Dinero") is not None
-            ) * 40
+
+            multi = 40 + random.randint(5, 30) + ("Amuleto del Pillager" in owned) * 20
+            multi += ("Trofeo de Dinero" in owned) * 40
             multi = (150 + random.randint(-5, 0)) if multi >= 150 else multi
             multi /= 100
 
@@ -1014,7 +1005,12 @@ class Econ(commands.Cog):
                 random.choice(ctx.l.econ.beg.negative).format(f"{amount}{self.d.emojis.emerald}")
             )
 
-    @commands.command(name="minar", aliases=["mi"])
+    # query budgets are the worst case for a new user, checked by test_econ_budgets.py
+    @commands.command(
+        name="minar",
+        aliases=["mi"],
+        extras={"query_budget": {"max_karen_packets": 25, "max_db_queries": 14}},
+    )
     @commands.guild_only()
     # @commands.cooldown(1, 4, commands.BucketType.user)
     @commands.max_concurrency(1, commands.BucketType.user)
@@ -1027,41 +1023,43 @@ class Econ(commands.Cog):
         # see if user has chugged a poción de suerte
         lucky = await self.karen.check_active_fx(ctx.author.id, "Poción de Suerte")
 
-        # iterate through items findable via mining
-        for item in self.d.mining.findables:
-            # check if user should get item based on rarity (item.rarity)
-            if random.randint(0, item.rarity) == 1 or (
-                lucky and random.randint(0, item.rarity) < 3
-            ):
-                await self.db.add_item(ctx.author.id, item.item, item.sell_price, 1, item.sticky)
+        # check if user should get an item based on the rarities of the items findable via mining
+        item = self.d.mining.draw_findable(lucky)
 
-                await ctx.reply_embed(
-                    f"{self.d.emojis[self.d.emoji_items[pickaxe]]} \uFEFF "
-                    + ctx.l.econ.mine.found_item_1.format(
-                        random.choice(ctx.l.econ.mine.actions),
-                        1,
-                        item.item,
-                        item.sell_price,
-                        self.d.emojis.emerald,
-                        random.choice(ctx.l.econ.mine.places),
-                    ),
-                )
+        if item is not None:
+            await self.db.add_item(ctx.author.id, item.item, item.sell_price, 1, item.sticky)
 
-                return
+            await ctx.reply_embed(
+                f"{self.d.emojis[self.d.emoji_items[pickaxe]]} \uFEFF "
+                + ctx.l.econ.mine.found_item_1.format(
+                    random.choice(ctx.l.econ.mine.actions),
+                    1,
+                    item.item,
+                    item.sell_price,
+                    self.d.emojis.emerald,
+                    random.choice(ctx.l.econ.mine.places),
+                ),
+            )
+
+            return
 
         # calculate if user finds emeralds or not
-        found = random.choice(self.calc_yield_chance_list(pickaxe))
+        found = self.d.mining.draw_yield(pickaxe)
 
         if found:
+            owned = await self.db.fetch_owned(
+                ctx.author.id, [*self.d.mining.yields_enchant_items, "Trofeo de Dinero"]
+            )
+
             # calculate bonus emeralds from enchantment items
             for item in self.d.mining.yields_enchant_items.keys():
-                if await self.db.fetch_item(ctx.author.id, item) is not None:
+                if item in owned:
                     found += random.choice(self.d.mining.yields_enchant_items[item])
                     break
 
             found = int(found) * random.randint(1, 2)
 
-            if await self.db.fetch_item(ctx.author.id, "Trofeo de Dinero") is not None:
+            if "Trofeo de Dinero" in owned:
                 found *= 2
 
             await self.db.balance_add(ctx.author.id, found)
@@ -1101,7 +1099,11 @@ class Econ(commands.Cog):
             if db_user.vault_max < 2000:
                 await self.db.update_user(ctx.author.id, vault_max=(db_user.vault_max + 1))
 
-    @commands.command(name="pescar", aliases=["pe"])
+    @commands.command(
+        name="pescar",
+        aliases=["pe"],
+        extras={"query_budget": {"max_karen_packets": 29, "max_db_queries": 17}},
+    )
     @commands.guild_only()
     # @commands.cooldown(1, 2, commands.BucketType.user)
     @commands.max_concurrency(1, commands.BucketType.user)
@@ -1109,7 +1111,11 @@ class Econ(commands.Cog):
         if not await self.math_problem(ctx, 5):
             return
 
-        if await self.db.fetch_item(ctx.author.id, "Caña de Pesca") is None:
+        owned = await self.db.fetch_owned(
+            ctx.author.id, ["Caña de Pesca", "Libro Atracción I", "Trofeo de Pesca"]
+        )
+
+        if "Caña de Pesca" not in owned:
             await ctx.reply_embed(ctx.l.econ.fishing.stupid_1)
             return
 
@@ -1118,13 +1124,12 @@ class Econ(commands.Cog):
         async with SuppressCtxManager(ctx.typing()):
             wait = random.randint(12, 32)
 
-            lure_i_book, seaweed_active, lucky = await asyncio.gather(
-                self.db.fetch_item(ctx.author.id, "Libro Atracción I"),
+            seaweed_active, lucky = await asyncio.gather(
                 self.karen.check_active_fx(ctx.author.id, "Alga Marina"),
                 self.karen.check_active_fx(ctx.author.id, "Poción de Suerte"),
             )
 
-            if lure_i_book is not None:
+            if "Libro Atracción I" in owned:
                 wait -= 4
 
             if seaweed_active:
@@ -1137,7 +1142,7 @@ class Econ(commands.Cog):
         if random.randint(1, 8) == 1 or (lucky and random.randint(1, 5) == 1):
 
             # calculate the chance for them to fish up junk (True means junk)
-            if await self.db.fetch_item(ctx.author.id, "Trofeo de Pesca") is not None or lucky:
+            if "Trofeo de Pesca" in owned or lucky:
                 junk_chance = (True, False, False, False, False)
             else:
                 junk_chance = (True, True, True, False, False)
@@ -1152,22 +1157,18 @@ class Econ(commands.Cog):
 
                 return
 
-            # iterate through fishing findables until something is found
-            while True:
-                for item in self.d.fishing.findables:
-                    if random.randint(0, (item.rarity // 2) + 2) == 1:
-                        await self.db.add_item(
-                            ctx.author.id, item.item, item.sell_price, 1, item.sticky
-                        )
-                        await ctx.reply_embed(
-                            random.choice(ctx.l.econ.fishing.item).format(
-                                item.item, item.sell_price, self.d.emojis.emerald
-                            ),
-                            True,
-                        )
-                        return
-
-        fish_id = random.choices(self.d.fishing.fish_ids, self.d.fishing.fishing_weights)[0]
+            item = self.d.fishing.draw_findable()
+
+            await self.db.add_item(ctx.author.id, item.item, item.sell_price, 1, item.sticky)
+            await ctx.reply_embed(
+                random.choice(ctx.l.econ.fishing.item).format(
+                    item.item, item.sell_price, self.d.emojis.emerald
+                ),
+                True,
+            )
+            return
+
+        fish_id = self.d.fishing.draw_fish()
         fish = self.d.fishing.fish[fish_id]
 
         await self.db.add_item(ctx.author.id, fish.name, -1, 1)
@@ -1184,7 +1185,11 @@ class Econ(commands.Cog):
             if db_user.vault_max < 2000:
                 await self.db.update_user(ctx.author.id, vault_max=(db_user.vault_max + 1))
 
-    @commands.command(name="robar", aliases=["rob"])
+    @commands.command(
+        name="robar",
+        aliases=["rob"],
+        extras={"query_budget": {"max_karen_packets": 29, "max_db_queries": 19}},
+    )
     @commands.guild_only()
     # @commands.cooldown(1, 300, commands.BucketType.user)
     @commands.max_concurrency(1, commands.BucketType.user)
@@ -1227,10 +1232,17 @@ class Econ(commands.Cog):
         if db_user.shield_pearl:
             await self.db.update_user(ctx.author.id, shield_pearl=None)
 
-        user_bees = getattr(await self.db.fetch_item(ctx.author.id, "Tarro de Abejas"), "amount", 0)
-        victim_bees = getattr(await self.db.fetch_item(victim.id, "Tarro de Abejas"), "amount", 0)
+        user_owned, victim_owned = await asyncio.gather(
+            self.db.fetch_owned(ctx.author.id, ["Tarro de Abejas", *self.d.sword_list_proper]),
+            self.db.fetch_owned(
+                victim.id, ["Tarro de Abejas", "Amuleto del Pillager", *self.d.sword_list_proper]
+            ),
+        )
 
-        if await self.db.fetch_item(victim.id, "Amuleto del Pillager"):
+        user_bees = user_owned.get("Tarro de Abejas", 0)
+        victim_bees = victim_owned.get("Tarro de Abejas", 0)
+
+        if "Amuleto del Pillager" in victim_owned:
             chances = [False] * 5 + [True]
         elif user_bees > victim_bees:
             chances = [False] * 3 + [True] * 5
@@ -1239,10 +1251,14 @@ class Econ(commands.Cog):
         else:
             chances = [True, False]
 
-        pillager_sword_lvl = self.d.sword_list.index(
-            (await self.db.fetch_sword(ctx.author.id)).lower()
-        )
-        victim_sword_lvl = self.d.sword_list.index((await self.db.fetch_sword(victim.id)).lower())
+        # fetch_sword is only needed if they don't own a sword, it gives them a wooden one
+        pillager_sword = next((s for s in self.d.sword_list_proper if s in user_owned), None)
+        pillager_sword = pillager_sword or await self.db.fetch_sword(ctx.author.id)
+        victim_sword = next((s for s in self.d.sword_list_proper if s in victim_owned), None)
+        victim_sword = victim_sword or await self.db.fetch_sword(victim.id)
+
+        pillager_sword_lvl = self.d.sword_list.index(pillager_sword.lower())
+        victim_sword_lvl = self.d.sword_list.index(victim_sword.lower())
 
         if pillager_sword_lvl > victim_sword_lvl:
             chances.append(True)
@@ -1429,19 +1445,16 @@ class Econ(commands.Cog):
 
             await self.db.remove_item(ctx.author.id, "Regalo", 1)
 
-            while True:
-                for item in self.d.mining.findables:
-                    if random.randint(0, (item.rarity // 2) + 2) == 1:
-                        await self.db.add_item(
-                            ctx.author.id, item.item, item.sell_price, 1, item.sticky
-                        )
-                        await ctx.reply_embed(
-                            random.choice(ctx.l.econ.use.present).format(
-                                item.item, item.sell_price, self.d.emojis.emerald
-                            )
-                        )
+            item = self.d.mining.draw_present()
+
+            await self.db.add_item(ctx.author.id, item.item, item.sell_price, 1, item.sticky)
+            await ctx.reply_embed(
+                random.choice(ctx.l.econ.use.present).format(
+                    item.item, item.sell_price, self.d.emojis.emerald
+                )
+            )
 
-                        return
+            return
 
         if thing == "barril":
             if amount > 1:
@@ -1450,20 +1463,17 @@ class Econ(commands.Cog):
 
             await self.db.remove_item(ctx.author.id, "Barril", 1)
 
-            for _ in range(20):
-                for item in self.d.mining.findables:
-                    if item.rarity > 1000:
-                        if random.randint(0, (item.rarity // 1.5) + 5) == 1:
-                            await self.db.add_item(
-                                ctx.author.id, item.item, item.sell_price, 1, item.sticky
-                            )
-                            await ctx.reply_embed(
-                                random.choice(ctx.l.econ.use.barrel_item).format(
-                                    item.item, item.sell_price, self.d.emojis.emerald
-                                )
-                            )
-
-                            return
+            item = self.d.mining.draw_barrel()
+
+            if item is not None:
+                await self.db.add_item(ctx.author.id, item.item, item.sell_price, 1, item.sticky)
+                await ctx.reply_embed(
+                    random.choice(ctx.l.econ.use.barrel_item).format(
+                        item.item, item.sell_price, self.d.emojis.emerald
+                    )
+                )
+
+                return
 
             ems = random.randint(2, 4096)
 
@@ -1641,9 +1651,7 @@ class Econ(commands.Cog):
     async def leaderboard_emeralds(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb_user("emeralds", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb_user(
-                "emeralds", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb_user("emeralds", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1657,9 +1665,7 @@ class Econ(commands.Cog):
     async def leaderboard_pillages(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("pillaged_emeralds", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "pillaged_emeralds", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("pillaged_emeralds", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1673,9 +1679,7 @@ class Econ(commands.Cog):
     async def leaderboard_mobkills(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("mobs_killed", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "mobs_killed", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("mobs_killed", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1689,9 +1693,7 @@ class Econ(commands.Cog):
     async def leaderboard_commands(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("commands", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "commands", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("commands", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1705,9 +1707,7 @@ class Econ(commands.Cog):
     async def leaderboard_fish(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("fish_fished", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "fish_fished", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("fish_fished", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1721,9 +1721,7 @@ class Econ(commands.Cog):
     async def leaderboard_farming(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("crops_planted", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "crops_planted", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("crops_planted", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1737,9 +1735,7 @@ class Econ(commands.Cog):
     async def leaderboard_trash(self, ctx: Ctx):
         async with SuppressCtxManager(ctx.typing()):
             global_lb = await self.db.fetch_global_lb("trash_emptied", ctx.author.id)
-            local_lb = await self.db.fetch_local_lb(
-                "trash_emptied", ctx.author.id, [m.id for m in ctx.guild.members if not m.bot]
-            )
+            local_lb = await self.db.fetch_local_lb("trash_emptied", ctx.author.id, ctx.guild)
 
             await self._lb_logic(
                 ctx,
@@ -1763,9 +1759,11 @@ class Econ(commands.Cog):
 
         max_plots = self.d.farming.max_plots[await self.db.fetch_hoe(ctx.author.id)]
 
-        emojis = [emojify_crop(self.d, r["crop_type"]) for r in db_farm_plots] + [
-            emojify_crop(self.d, "dirt")
-        ] * (max_plots - len(db_farm_plots))
+        plots_count = sum(r["amount"] for r in db_farm_plots)
+
+        emojis = [
+            emojify_crop(self.d, r["crop_type"]) for r in db_farm_plots for _ in range(r["amount"])
+        ] + [emojify_crop(self.d, "dirt")] * (max_plots - plots_count)
         emoji_farm = "> " + "\n> ".join(
             "".join(r[::-1])
             for r in zip(*[emojis[i : i + 5] for i in range(0, len(emojis), 5)][::-1])
@@ -1787,7 +1785,7 @@ class Econ(commands.Cog):
         embed.description = (
             emoji_farm
             + "\n\n"
-            + ctx.l.econ.farm.available.format(available=available, max=len(db_farm_plots))
+            + ctx.l.econ.farm.available.format(available=available, max=plots_count)
         )
 
         await ctx.send(embed=embed)
@@ -1913,11 +1911,11 @@ class Econ(commands.Cog):
                 ]
             )
 
+            owned = await self.db.fetch_owned(ctx.author.id, ["Trofeo de Dinero", "Reciclador"])
+
             total_ems = sum([float(item["amount"]) * item["value"] for item in items])
-            total_ems *= (
-                await self.db.fetch_item(ctx.author.id, "Trofeo de Dinero") is not None
-            ) + 1
-            total_ems *= (await self.db.fetch_item(ctx.author.id, "Reciclador") is not None) + 1
+            total_ems *= ("Trofeo de Dinero" in owned) + 1
+            total_ems *= ("Reciclador" in owned) + 1
 
             embed.description = (
                 ctx.l.econ.trash.total_contents.format(
@@ -1933,9 +1931,11 @@ class Econ(commands.Cog):
     async def trashcan_empty(self, ctx: Ctx):
         total_ems, amount = await self.db.empty_trashcan(ctx.author.id)
 
+        owned = await self.db.fetch_owned(ctx.author.id, ["Trofeo de Dinero", "Reciclador"])
+
         total_ems = math.floor(total_ems)
-        total_ems *= (await self.db.fetch_item(ctx.author.id, "Trofeo de Dinero") is not None) + 1
-        total_ems *= (await self.db.fetch_item(ctx.author.id, "Reciclador") is not None) + 1
+        total_ems *= ("Trofeo de Dinero" in owned) + 1
+        total_ems *= ("Reciclador" in owned) + 1
 
         await self.db.balance_add(ctx.author.id, total_ems)
 
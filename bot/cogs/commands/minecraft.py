@@ -19,14 +19,19 @@ from bot.utils.misc import SuppressCtxManager, fix_giphy_url
 from bot.villager_bot import VillagerBotCluster
 
 try:
-    from bot.utils import tiler
+    from bot.utils.render_service import RenderService
 except Exception:
-    tiler = None
+    RenderService = None
 
 
 VALID_TILER_FILE_TYPES = {"jpg", "png", "jpeg", "gif", "mp4"}
 TILER_MAX_DIM = 1600
 TILER_MAX_DIM_GIF = 800
+TILER_WORKERS = 2
+TILER_MAX_QUEUED = 16  # renders queued or running at once on a cluster
+TILER_MAX_PER_USER = 1
+TILER_MEMORY_CACHE_SIZE = 64  # converted images
+TILER_DISK_CACHE_BYTES = 512 * 1024 * 1024
 
 
 class Minecraft(commands.Cog):
@@ -39,10 +44,23 @@ class Minecraft(commands.Cog):
         self.aiohttp = bot.aiohttp
         self.fernet_key = Fernet(self.k.rcon_fernet_key)
 
-        if tiler:
-            self.tiler = tiler.Tiler("bot/data/block_palette.json")
+        if RenderService:
+            self.render_service = RenderService(
+                "bot/data/block_atlas.npy",
+                "bot/data/block_lut.npy",
+                workers=TILER_WORKERS,
+                max_queued=TILER_MAX_QUEUED,
+                max_per_user=TILER_MAX_PER_USER,
+                memory_cache_size=TILER_MEMORY_CACHE_SIZE,
+                disk_cache_dir="tmp/render_cache",
+                disk_cache_bytes=TILER_DISK_CACHE_BYTES,
+            )
         else:
-            self.tiler = None
+            self.render_service = None
+
+    def cog_unload(self):
+        if self.render_service:
+            self.render_service.shutdown()
 
     @property
     def db(self) -> Database:
@@ -8,6 +8,7 @@ import arrow
 import discord
 from discord.ext import commands
 
+from common.utils.cache import LRUCache, get_caches
 from common.utils.code import execute_code, format_exception
 
 from bot.cogs.core.database import Database
@@ -150,8 +151,7 @@ class Owner(commands.Cog):
         else:
             uid = user
 
-        await self.db.update_user(uid, bot_banned=True)
-        await self.karen.botban_cache_add(uid)
+        await self.db.set_botbanned(uid, True)
 
         await ctx.message.add_reaction(self.d.emojis.yes)
 
@@ -163,8 +163,7 @@ class Owner(commands.Cog):
         else:
             uid = user
 
-        await self.db.update_user(uid, bot_banned=False)
-        await self.karen.botban_cache_remove(uid)
+        await self.db.set_botbanned(uid, False)
 
         await ctx.message.add_reaction(self.d.emojis.yes)
 
@@ -321,6 +320,93 @@ class Owner(commands.Cog):
             f"**Command Streaks** (last week)\n```md\n## d  h  m  s  | user id             | name\n{formatted_rows}\n```"
         )
 
+    @commands.command(name="querystats", aliases=["qstats"])
+    @commands.is_owner()
+    async def query_stats(self, ctx: Ctx, limit: int = 15):
+        query_stats = await self.karen.fetch_query_stats(limit)
+
+        formatted_rows = "\n".join(
+            [
+                f"{f'{i+1}.':<3} {q['calls']:<8} | {q['mean_time'] * 1000:>8.2f} | {q['max_time'] * 1000:>8.2f} "
+                f"| {shorten_text(' '.join(q['query'].split()), 60)}"
+                for i, q in enumerate(query_stats)
+            ]
+        )
+
+        await ctx.reply(
+            f"**Query Stats** (by total time)\n```md\n##  calls    | mean ms  | max ms   | query\n{formatted_rows[:1900]}\n```"
+        )
+
+    @commands.command(name="commandstats", aliases=["cmdstats"])
+    @commands.is_owner()
+    async def command_stats(self, ctx: Ctx, limit: int = 15):
+        totals = dict[str, dict[str, Any]]()
+
+        # sum up the stats of all clusters
+        for s in await self.karen.fetch_clusters_command_usage():
+            total = totals.get(s["command"])
+
+            if total is None:
+                totals[s["command"]] = s
+                continue
+
+            for key in ("calls", "karen_packets", "db_queries", "karen_time"):
+                total[key] += s[key]
+
+            for key in ("max_karen_packets", "max_db_queries"):
+                total[key] = max(total[key], s[key])
+
+        command_stats = sorted(totals.values(), key=(lambda s: s["karen_packets"]), reverse=True)
+
+        formatted_rows = "\n".join(
+            [
+                f"{s['command']:<16} | {s['calls']:>7} | {s['karen_packets'] / s['calls']:>6.1f} {s['max_karen_packets']:>4} "
+                f"| {s['db_queries'] / s['calls']:>6.1f} {s['max_db_queries']:>4} | {s['karen_time'] / s['calls'] * 1000:>8.2f}"
+                for s in command_stats[:limit]
+            ]
+        )
+
+        await ctx.reply(
+            f"**Command Stats** (by total Karen packets)\n```md\n## command       | calls   | packets avg/max | queries avg/max | karen ms\n{formatted_rows[:1850]}\n```"
+        )
+
+    @commands.command(name="cachestats", aliases=["cstats"])
+    @commands.is_owner()
+    async def cache_stats(self, ctx: Ctx):
+        formatted_rows = "\n".join(
+            [
+                f"{c['name']:<16} | {c['size']:>7}/{c['maxsize']:<7} | {c['hit_rate'] * 100:>5.1f}% "
+                f"| {c['evictions']:>8} | {c['expirations']:>8}"
+                for c in map(LRUCache.stats, get_caches())
+            ]
+        )
+
+        await ctx.reply(
+            f"**Cache Stats** (cluster {self.bot.cluster_id})\n```md\n## name          | size            | hits   | evicted  | expired\n{formatted_rows}\n```"
+        )
+
+    @commands.command(name="renderstats", aliases=["rstats"])
+    @commands.is_owner()
+    async def render_stats(self, ctx: Ctx):
+        render_service = getattr(self.bot.get_cog("Minecraft"), "render_service", None)
+
+        if render_service is None:
+            await ctx.reply("The render service isn't running on this cluster")
+            return
+
+        s = render_service.stats()
+
+        await ctx.reply(
+            f"**Render Stats** (cluster {self.bot.cluster_id})\n```md\n"
+            f"queued: {s['queued']}, renders: {s['renders']}, failures: {s['failures']}\n"
+            f"wait ms:   mean {s['mean_wait_time'] * 1000:>8.1f} | max {s['max_wait_time'] * 1000:>8.1f}\n"
+            f"render ms: mean {s['mean_render_time'] * 1000:>8.1f} | max {s['max_render_time'] * 1000:>8.1f}\n"
+            f"memory cache: {s['memory_cache']['size']}/{s['memory_cache']['maxsize']}, "
+            f"{s['memory_cache']['hit_rate'] * 100:.1f}% hits\n"
+            f"disk cache: {s['disk_cache']['bytes'] / 1024 / 1024:.1f}/{s['disk_cache']['max_bytes'] / 1024 / 1024:.0f} MiB, "
+            f"{s['disk_cache']['hit_rate'] * 100:.1f}% hits\n```"
+        )
+
     @commands.command(name="shutdown")
     @commands.is_owner()
     async def shutdown(self, ctx: Ctx):
@@ -3,7 +3,6 @@ import io
 import json
 import os
 import secrets
-import time
 from contextlib import suppress
 from typing import Any, Optional
 from urllib.parse import quote as urlquote
@@ -19,6 +18,7 @@ from discord.ext import commands, tasks
 from PIL import ExifTags, Image
 
 from common.models.system_stats import SystemStats
+from common.utils.cache import LRUCache
 
 from bot.cogs.core.database import Database
 from bot.cogs.core.paginator import Paginator
@@ -46,7 +46,9 @@ class Useful(commands.Cog):
         self.google = async_cse.Search(bot.k.google_search)
         self.aiohttp = bot.aiohttp
 
-        self.snipes = dict[int, tuple[discord.Message, float]]()
+        self.snipes = LRUCache[int, discord.Message](
+            10_000, ttl=(5 * 60), name="snipes"
+        )  # {channel_id: message}
         self.clear_snipes.start()
 
     @property
@@ -63,16 +65,11 @@ class Useful(commands.Cog):
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         if not message.author.bot and message.content:
-            self.snipes[message.channel.id] = message, time.time()
+            self.snipes[message.channel.id] = message
 
     @tasks.loop(seconds=30)
     async def clear_snipes(self):
-        for k, v in list(self.snipes.items()):
-            if time.time() - v[1] > 5 * 60:
-                try:
-                    del self.snipes[k]
-                except KeyError:
-                    pass
+        self.snipes.clear_expired()
 
     def _get_main_help_embed(self, lang: Translation, prefix: str) -> discord.Embed:
         embed = discord.Embed(color=self.bot.embed_color)
@@ -1,19 +1,26 @@
 import asyncio
 import datetime
-from collections import defaultdict
-from contextlib import suppress
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Iterable, Optional
 
 import discord
 from discord.ext import commands
 
+from common.data.enums.cache_topic import CacheTopic
 from common.data.enums.guild_event_type import GuildEventType
 from common.models.db.guild import Guild
 from common.models.db.item import Item
 from common.models.db.user import User
+from common.utils.leaderboard_sql import current_value
 
 from bot.villager_bot import VillagerBotCluster
 
+STARTER_ITEMS = [  # (name, sell_price, amount, sticky, sellable)
+    ("Pico de Madera", 0, 1, True, False),
+    ("Espada de Madera", 0, 1, True, False),
+    ("Azada de Madera", 0, 1, True, False),
+    ("Semilla de Trigo", 24, 5, False, True),
+]
+
 
 class Database(commands.Cog):
     def __init__(self, bot: VillagerBotCluster):
@@ -22,6 +29,7 @@ class Database(commands.Cog):
         self.d = bot.d
         self.k = bot.k
         self.db = bot.db
+        self.karen = bot.karen
 
         asyncio.create_task(self.populate_caches())
 
@@ -33,57 +41,94 @@ class Database(commands.Cog):
         # caches which need to be maintained across all clusters
         self.bot.botban_cache = await self.fetch_all_botbans()
 
-        # per-guild caches, should only load settings for guilds the cluster can actually see
-        self.bot.disabled_commands.update(await self.fetch_all_disabled_commands())
-        self.bot.language_cache = await self.fetch_all_guild_langs()
-        self.bot.prefix_cache = await self.fetch_all_guild_prefixes()
-        self.bot.replies_cache = await self.fetch_all_do_replies()
+        # per-guild caches, only settings for guilds on this cluster's shards are loaded
+        async for records in self.fetch_shard_guild_settings():
+            for r in records:
+                if r["language"] not in ("es", "es_ES"):
+                    self.bot.language_cache[r["guild_id"]] = r["language"]
+
+                if r["prefix"] != self.k.default_prefix:
+                    self.bot.prefix_cache[r["guild_id"]] = r["prefix"]
+
+                if not r["do_replies"]:
+                    self.bot.no_replies_cache.add(r["guild_id"])
+
+        async for records in self.fetch_shard_disabled_commands():
+            for r in records:
+                self.bot.disabled_commands[r["guild_id"]].add(r["command"])
 
     async def fetch_user_reminder_count(self, user_id: int) -> int:
         return await self.db.fetchval("SELECT COUNT(*) FROM reminders WHERE user_id = $1", user_id)
 
     async def add_reminder(
-        self, user_id: int, channel_id: int, message_id: int, reminder: str, at: datetime.datetime
+        self,
+        user_id: int,
+        guild_id: Optional[int],
+        channel_id: int,
+        message_id: int,
+        reminder: str,
+        at: datetime.datetime,
     ) -> None:
-        await self.db.execute(
-            "INSERT INTO reminders (user_id, channel_id, message_id, reminder, at) VALUES ($1, $2, $3, $4, $5)",
-            user_id,
-            channel_id,
-            message_id,
-            reminder,
-            at,
-        )
+        # goes through Karen so the reminder is scheduled as well
+        await self.karen.reminder_add(user_id, guild_id, channel_id, message_id, reminder, at)
 
     async def fetch_all_botbans(self) -> set[int]:
-        botban_records = await self.db.fetch("SELECT user_id FROM users WHERE bot_banned = true")
-        return {r["user_id"] for r in botban_records}
+        return {
+            r["user_id"]
+            async for r in self.db.cursor("SELECT user_id FROM users WHERE bot_banned = true")
+        }
+
+    async def fetch_shard_guild_settings(
+        self, page_size: int = 5000
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yields pages of non-default guild settings for guilds on this cluster's shards"""
+
+        last_guild_id = -1
+
+        while True:
+            records = await self.db.fetch(
+                "SELECT guild_id, prefix, language, do_replies FROM guilds WHERE guild_id > $1 AND (guild_id >> 22) % $2 = ANY($3::BIGINT[]) "
+                "AND (prefix != $4 OR language NOT IN ('es', 'es_ES') OR NOT do_replies) ORDER BY guild_id LIMIT $5",
+                last_guild_id,
+                self.bot.shard_count,
+                self.bot.shard_ids,
+                self.k.default_prefix,
+                page_size,
+            )
 
-    async def fetch_all_guild_langs(self) -> dict:
-        lang_records = await self.db.fetch(
-            "SELECT guild_id, language FROM guilds WHERE language != $1 AND language != $2",
-            "es",
-            "es_ES",
-        )
-        return {r["guild_id"]: r["language"] for r in lang_records}
+            if records:
+                yield records
 
-    async def fetch_all_guild_prefixes(self) -> dict[int, str]:
-        prefix_records = await self.db.fetch(
-            "SELECT guild_id, prefix FROM guilds WHERE prefix != $1", self.k.default_prefix
-        )
-        return {r["guild_id"]: r["prefix"] for r in prefix_records}
+            if len(records) < page_size:
+                return
 
-    async def fetch_all_disabled_commands(self) -> dict[int, set[str]]:
-        disabled_records = await self.db.fetch("SELECT * FROM disabled_commands")
-        disabled = defaultdict(set)
+            last_guild_id = records[-1]["guild_id"]
 
-        for record in disabled_records:
-            disabled[record["guild_id"]].add(record["command"])
+    async def fetch_shard_disabled_commands(
+        self, page_size: int = 5000
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yields pages of disabled commands for guilds on this cluster's shards"""
 
-        return disabled
+        last_guild_id, last_command = -1, ""
 
-    async def fetch_all_do_replies(self) -> set[int]:
-        replies_records = await self.db.fetch("SELECT guild_id FROM guilds WHERE do_replies = true")
-        return {r["guild_id"] for r in replies_records}
+        while True:
+            records = await self.db.fetch(
+                "SELECT guild_id, command FROM disabled_commands WHERE (guild_id, command) > ($1, $2) AND (guild_id >> 22) % $3 = ANY($4::BIGINT[]) "
+                "ORDER BY guild_id, command LIMIT $5",
+                last_guild_id,
+                last_command,
+                self.bot.shard_count,
+                self.bot.shard_ids,
+                page_size,
+            )
+
+            if records:
+                yield records
+
+            if len(records) < page_size:
+                return
+
+            last_guild_id, last_command = records[-1]["guild_id"], records[-1]["command"]
 
     async def fetch_guild(self, guild_id: int) -> Guild:
         g = await self.db.fetchrow("SELECT * FROM guilds WHERE guild_id = $1", guild_id)
@@ -108,6 +153,7 @@ class Database(commands.Cog):
 
         self.bot.language_cache.pop(guild_id, None)
         self.bot.prefix_cache.pop(guild_id, None)
+        self.bot.no_replies_cache.discard(guild_id)
 
     async def set_cmd_usable(self, guild_id: int, command: str, usable: bool) -> None:
         if usable:
@@ -129,23 +175,30 @@ class Database(commands.Cog):
 
         await self.fetch_user(user_id)  # will create user if they don't exist
 
-        self.bot.existing_user_lbs_cache.add(user_id)
-
-        if len(self.bot.existing_users_cache) > 30:
-            self.bot.existing_users_cache.pop()
-
     async def fetch_user(self, user_id: int) -> User:
         user = await self.db.fetchrow("SELECT * FROM users WHERE user_id = $1", user_id)
 
         if user is None:
+            # create the user and give them their starter items in one go, if another
+            # command created them in the meantime the existing row is returned instead
             user = await self.db.fetchrow(
-                "INSERT INTO users (user_id) VALUES ($1) RETURNING *", user_id
+                """WITH new_user AS (
+    INSERT INTO users (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING RETURNING *
+), new_items AS (
+    INSERT INTO items (user_id, name, sell_price, amount, sticky, sellable)
+    SELECT $1, i.* FROM UNNEST($2::VARCHAR(50)[], $3::INT[], $4::BIGINT[], $5::BOOLEAN[], $6::BOOLEAN[]) AS i
+    WHERE EXISTS (SELECT 1 FROM new_user)
+)
+SELECT * FROM new_user UNION ALL SELECT * FROM users WHERE user_id = $1""",
+                user_id,
+                *map(list, zip(*STARTER_ITEMS)),
             )
 
-            await self.add_item(user_id, "Pico de Madera", 0, 1, True, False)
-            await self.add_item(user_id, "Espada de Madera", 0, 1, True, False)
-            await self.add_item(user_id, "Azada de Madera", 0, 1, True, False)
-            await self.add_item(user_id, "Semilla de Trigo", 24, 5)
+            # the other insert committed after the query's snapshot was taken, so it's only visible now
+            if user is None:
+                user = await self.db.fetchrow("SELECT * FROM users WHERE user_id = $1", user_id)
+
+        self.bot.existing_users_cache.add(user_id)
 
         return User(**user)
 
@@ -154,6 +207,9 @@ class Database(commands.Cog):
             user_id
         )  # ensures user exists + we use db_user for updating badges
 
+        if "health" in kwargs:  # health regenerates from health_at, see User
+            kwargs["health_at"] = datetime.datetime.now(datetime.timezone.utc)
+
         values = []
         sql = []
 
@@ -166,6 +222,9 @@ class Database(commands.Cog):
             f"UPDATE users SET {','.join(sql)} WHERE user_id = ${i+2}", *values, user_id
         )
 
+        if "emeralds" in kwargs or "bot_banned" in kwargs:
+            await self.karen.leaderboard_sync_user(user_id)
+
         # update badges
         await self.badges.update_badge_uncle_scrooge(user_id, db_user)
 
@@ -179,9 +238,7 @@ class Database(commands.Cog):
         db_user = await self.fetch_user(
             user_id
         )  # ensures user exists + we use db_user for updating badges
-        await self.db.execute(
-            "UPDATE users SET emeralds = $1 WHERE user_id = $2", emeralds, user_id
-        )
+        await self.karen.leaderboard_update(user_id, "emeralds", emeralds, "set")
 
         # update badges
         await self.badges.update_badge_uncle_scrooge(user_id, db_user)
@@ -235,6 +292,21 @@ class Database(commands.Cog):
 
         return None
 
+    async def fetch_owned(self, user_id: int, names: Iterable[str]) -> dict[str, int]:
+        """Returns {name: amount} for the items in names which the user owns, in one query"""
+
+        await self.ensure_user_exists(user_id)
+
+        names_lower = {name.lower(): name for name in names}
+
+        rows = await self.db.fetch(
+            "SELECT LOWER(name) AS name, amount FROM items WHERE user_id = $1 AND LOWER(name) = ANY($2::VARCHAR(250)[])",
+            user_id,
+            list(names_lower),
+        )
+
+        return {names_lower[r["name"]]: r["amount"] for r in rows}
+
     async def add_item(
         self,
         user_id: int,
@@ -370,32 +442,10 @@ class Database(commands.Cog):
         await self.db.execute("DELETE FROM trash_can WHERE user_id = $1", user_id)
         await self.db.execute("DELETE FROM farm_plots WHERE user_id = $1", user_id)
 
-    async def ensure_user_lb(self, user_id: int) -> None:
-        """Ensure that a user exists in the leaderboards table"""
-
-        if user_id in self.bot.existing_user_lbs_cache:
-            return
-
-        lbs = await self.db.fetchrow("SELECT * FROM leaderboards WHERE user_id = $1", user_id)
-
-        if lbs is None:
-            await self.db.execute("INSERT INTO leaderboards (user_id) VALUES ($1)", user_id)
-
-        self.bot.existing_user_lbs_cache.add(user_id)
-
-        if len(self.bot.existing_user_lbs_cache) > 30:
-            self.bot.existing_user_lbs_cache.pop()
-
     async def update_lb(self, user_id: int, lb: str, value: int, mode: str = "add") -> None:
-        await self.ensure_user_lb(user_id)  # ensure lb entry exists
-
-        if mode == "add":
-            user_lb_value = await self.db.fetchval(
-                f"UPDATE leaderboards SET {lb} = {lb} + $1 WHERE user_id = $2 RETURNING {lb}",
-                value,
-                user_id,
-            )
+        user_lb_value = await self.karen.leaderboard_update(user_id, lb, value, mode)
 
+        if mode in ("add", "set"):
             if lb == "pillaged_emeralds":
                 await self.badges.update_badge_pillager(user_id, user_lb_value)
             elif lb == "mobs_killed":
@@ -404,72 +454,48 @@ class Database(commands.Cog):
                 await self.badges.update_badge_fisherman(user_id, user_lb_value)
             elif lb == "commands":
                 await self.badges.update_badge_enthusiast(user_id, user_lb_value)
-        elif mode == "sub":
-            await self.db.execute(
-                f"UPDATE leaderboards SET {lb} = {lb} - $1 WHERE user_id = $2", value, user_id
-            )
-        elif mode == "set":
-            await self.db.execute(
-                f"UPDATE leaderboards SET {lb} = $1 WHERE user_id = $2", value, user_id
-            )
-
-            if lb == "pillaged_emeralds":
-                await self.badges.update_badge_pillager(user_id, value)
-            elif lb == "mobs_killed":
-                await self.badges.update_badge_murderer(user_id, value)
-            elif lb == "fish_fished":
-                await self.badges.update_badge_fisherman(user_id, value)
 
     async def fetch_global_lb(self, lb: str, user_id: int) -> list[dict[str, Any]]:
-        return await self.db.fetch(
-            f"""
-        WITH lb AS (SELECT user_id, {lb} AS amount, ROW_NUMBER() OVER(ORDER BY {lb} DESC) AS idx FROM leaderboards)
-        (
-            (SELECT lb.* FROM lb LIMIT 10)
-            UNION
-            (SELECT lb.* FROM lb WHERE lb.user_id = $1)
-        ) ORDER BY idx;""",
-            user_id,
-        )
+        return await self.karen.fetch_leaderboard(lb, user_id)
+
+    async def fetch_local_lb(
+        self, lb: str, user_id: int, guild: discord.Guild
+    ) -> list[dict[str, Any]]:
+        await self.ensure_guild_members(guild)
+
+        # weekly leaderboards are reset lazily, so values from previous weeks have to be ignored
+        lb = current_value(lb)
 
-    async def fetch_local_lb(self, lb: str, user_id: int, user_ids: list) -> list[dict[str, Any]]:
         return await self.db.fetch(
             f"""
-        WITH lb AS (SELECT user_id, {lb} AS amount, ROW_NUMBER() OVER(ORDER BY {lb} DESC) AS idx FROM leaderboards WHERE user_id = ANY($2::BIGINT[]))
+        WITH lb AS (SELECT user_id, {lb} AS amount, ROW_NUMBER() OVER(ORDER BY {lb} DESC) AS idx FROM leaderboards JOIN guild_members USING (user_id) WHERE guild_id = $2)
         (
             (SELECT lb.* FROM lb LIMIT 10)
             UNION
             (SELECT lb.* FROM lb WHERE lb.user_id = $1)
         ) ORDER BY idx;""",
             user_id,
-            user_ids,
+            guild.id,
         )
 
     async def fetch_global_lb_user(self, column: str, user_id: int) -> list[dict[str, Any]]:
-        return await self.db.fetch(
-            f"""
-        WITH lb AS (SELECT user_id, {column} AS amount, ROW_NUMBER() OVER(ORDER BY {column} DESC) AS idx FROM users WHERE {column} > 0 AND bot_banned = false)
-        (
-            (SELECT lb.* FROM lb LIMIT 10)
-            UNION
-            (SELECT lb.* FROM lb WHERE lb.user_id = $1)
-        ) ORDER BY idx;""",
-            user_id,
-        )
+        return await self.karen.fetch_leaderboard(column, user_id)
 
     async def fetch_local_lb_user(
-        self, column: str, user_id: int, user_ids: list
+        self, column: str, user_id: int, guild: discord.Guild
     ) -> list[dict[str, Any]]:
+        await self.ensure_guild_members(guild)
+
         return await self.db.fetch(
             f"""
-        WITH lb AS (SELECT user_id, {column} AS amount, ROW_NUMBER() OVER(ORDER BY {column} DESC) AS idx FROM users WHERE {column} > 0 AND bot_banned = false AND user_id = ANY($2::BIGINT[]))
+        WITH lb AS (SELECT user_id, {column} AS amount, ROW_NUMBER() OVER(ORDER BY {column} DESC) AS idx FROM users JOIN guild_members USING (user_id) WHERE {column} > 0 AND bot_banned = false AND guild_id = $2)
         (
             (SELECT lb.* FROM lb LIMIT 10)
             UNION
             (SELECT lb.* FROM lb WHERE lb.user_id = $1)
         ) ORDER BY idx;""",
             user_id,
-            user_ids,
+            guild.id,
         )
 
     async def fetch_global_lb_item(self, item: str, user_id: int) -> list[dict[str, Any]]:
@@ -486,11 +512,13 @@ class Database(commands.Cog):
         )
 
     async def fetch_local_lb_item(
-        self, item: str, user_id: int, user_ids: list
+        self, item: str, user_id: int, guild: discord.Guild
     ) -> list[dict[str, Any]]:
+        await self.ensure_guild_members(guild)
+
         return await self.db.fetch(
             """
-        WITH lb AS (SELECT user_id, amount, ROW_NUMBER() OVER(ORDER BY amount DESC) AS idx FROM items WHERE LOWER(name) = LOWER($2) AND user_id = ANY($3::BIGINT[]))
+        WITH lb AS (SELECT user_id, amount, ROW_NUMBER() OVER(ORDER BY amount DESC) AS idx FROM items JOIN guild_members USING (user_id) WHERE LOWER(name) = LOWER($2) AND guild_id = $3)
         (
             (SELECT lb.* FROM lb LIMIT 10)
             UNION
@@ -498,7 +526,7 @@ class Database(commands.Cog):
         ) ORDER BY idx;""",
             user_id,
             item,
-            user_ids,
+            guild.id,
         )
 
     async def fetch_global_lb_unique_items(self, user_id: int) -> list[dict[str, Any]]:
@@ -514,33 +542,27 @@ class Database(commands.Cog):
         )
 
     async def fetch_local_lb_unique_items(
-        self, user_id: int, user_ids: list
+        self, user_id: int, guild: discord.Guild
     ) -> list[dict[str, Any]]:
+        await self.ensure_guild_members(guild)
+
         return await self.db.fetch(
             """
-        WITH lb AS (SELECT user_id, COUNT(*) AS amount, ROW_NUMBER() OVER(ORDER BY COUNT(*) DESC) AS idx FROM items WHERE user_id = ANY($2::BIGINT[]) GROUP BY user_id)
+        WITH lb AS (SELECT user_id, COUNT(*) AS amount, ROW_NUMBER() OVER(ORDER BY COUNT(*) DESC) AS idx FROM items JOIN guild_members USING (user_id) WHERE guild_id = $2 GROUP BY user_id)
         (
             (SELECT lb.* FROM lb LIMIT 10)
             UNION
             (SELECT lb.* FROM lb WHERE lb.user_id = $1)
         ) ORDER BY idx;""",
             user_id,
-            user_ids,
+            guild.id,
         )
 
     async def set_botbanned(self, user_id: int, botbanned: bool) -> None:
-        await self.ensure_user_exists(user_id)
+        # through update_user so the user is also added to / removed from the global leaderboards
+        await self.update_user(user_id, bot_banned=botbanned)
 
-        if botbanned:
-            if user_id not in self.bot.botban_cache:
-                self.bot.botban_cache.add(user_id)
-        else:
-            with suppress(ValueError):
-                self.bot.botban_cache.remove(user_id)
-
-        await self.db.execute(
-            "UPDATE users SET bot_banned = $1 WHERE user_id = $2", botbanned, user_id
-        )
+        await self.karen.publish_cache_invalidation(CacheTopic.BOTBAN, user_id, botbanned)
 
     async def add_warn(self, user_id: int, guild_id: int, mod_id: int, reason: str) -> None:
         await self.db.execute(
@@ -615,32 +637,39 @@ class Database(commands.Cog):
         )
 
     async def fetch_farm_plots(self, user_id: int) -> list[dict[str, Any]]:
+        """Fetches the user's planted batches of crops, each batch takes up amount farm plots"""
+
         return await self.db.fetch(
             "SELECT * FROM farm_plots WHERE user_id = $1 ORDER BY planted_at ASC", user_id
         )
 
     async def count_farm_plots(self, user_id: int) -> int:
-        return await self.db.fetchval("SELECT COUNT(*) FROM farm_plots WHERE user_id = $1", user_id)
+        return await self.db.fetchval(
+            "SELECT COALESCE(SUM(amount), 0) FROM farm_plots WHERE user_id = $1", user_id
+        )
 
     async def count_ready_farm_plots(self, user_id: int) -> int:
         return await self.db.fetchval(
-            "SELECT COUNT(*) FROM farm_plots WHERE user_id = $1 AND NOW() > planted_at + grow_time",
+            "SELECT COALESCE(SUM(amount), 0) FROM farm_plots WHERE user_id = $1 AND NOW() > planted_at + grow_time",
             user_id,
         )
 
     async def add_farm_plot(self, user_id: int, crop_type: str, amount: int) -> None:
         crop_time = self.d.farming.crop_times[crop_type]
 
-        await self.db.executemany(
-            "INSERT INTO farm_plots (user_id, crop_type, planted_at, grow_time) VALUES ($1, $2, NOW(), $3::TEXT::INTERVAL)",
-            [(user_id, crop_type, crop_time) for _ in range(amount)],
+        await self.db.execute(
+            "INSERT INTO farm_plots (user_id, crop_type, planted_at, grow_time, amount) VALUES ($1, $2, NOW(), $3::TEXT::INTERVAL, $4)",
+            user_id,
+            crop_type,
+            crop_time,
+            amount,
         )
 
         await self.update_lb(user_id, "crops_planted", amount)
 
     async def fetch_ready_crops(self, user_id: int) -> list[dict[str, Any]]:
         return await self.db.fetch(
-            "SELECT COUNT(crop_type) count, crop_type FROM farm_plots WHERE user_id = $1 AND NOW() > planted_at + grow_time GROUP BY crop_type ORDER BY count DESC",
+            "SELECT SUM(amount) count, crop_type FROM farm_plots WHERE user_id = $1 AND NOW() > planted_at + grow_time GROUP BY crop_type ORDER BY count DESC",
             user_id,
         )
 
@@ -663,8 +692,11 @@ class Database(commands.Cog):
         )
 
     async def add_to_trashcan(self, user_id: int, item: str, value: float, amount: int) -> None:
+        # value is averaged by amount so emptying pays out what each item was worth when trashed
         await self.db.execute(
-            "INSERT INTO trash_can (user_id, item, value, amount) VALUES ($1, $2, $3, $4)",
+            "INSERT INTO trash_can (user_id, item, value, amount) VALUES ($1, $2, $3, $4) "
+            "ON CONFLICT (user_id, item) DO UPDATE SET value = COALESCE((trash_can.value * trash_can.amount + EXCLUDED.value * EXCLUDED.amount) / NULLIF(trash_can.amount + EXCLUDED.amount, 0), EXCLUDED.value), "
+            "amount = trash_can.amount + EXCLUDED.amount",
             user_id,
             item,
             value,
@@ -673,16 +705,16 @@ class Database(commands.Cog):
 
     async def fetch_trashcan(self, user_id: int) -> list[dict[str, Any]]:
         return await self.db.fetch(
-            "SELECT item, value, SUM(amount) AS amount FROM trash_can WHERE user_id = $1 GROUP BY item, value",
+            "SELECT item, value, amount FROM trash_can WHERE user_id = $1",
             user_id,
         )
 
     async def empty_trashcan(self, user_id: int) -> tuple[float, int]:
         trashcan = await self.db.fetchrow(
-            "SELECT COALESCE(SUM(value * amount), 0) AS total_value, COALESCE(SUM(amount), 0) AS amount FROM trash_can WHERE user_id = $1",
+            "WITH emptied AS (DELETE FROM trash_can WHERE user_id = $1 RETURNING value, amount) "
+            "SELECT COALESCE(SUM(value * amount), 0) AS total_value, COALESCE(SUM(amount), 0) AS amount FROM emptied",
             user_id,
         )
-        await self.db.execute("DELETE FROM trash_can WHERE user_id = $1", user_id)
         return (float(trashcan["total_value"]), int(trashcan["amount"]))
 
     async def add_guild_join(self, guild: discord.Guild):
@@ -705,6 +737,50 @@ class Database(commands.Cog):
             guild.member_count,
         )
 
+    async def ensure_guild_members(self, guild: discord.Guild) -> None:
+        """Syncs a guild's members to the db once, afterwards member events keep them up to date"""
+
+        if guild.id in self.bot.synced_member_guilds:
+            return
+
+        member_ids = [m.id for m in guild.members if not m.bot]
+
+        # the member list is incomplete until the guild is chunked, so until then members missing
+        # from it can't be removed and the guild is synced again next time
+        if not guild.chunked:
+            await self.db.execute(
+                "INSERT INTO guild_members (guild_id, user_id) SELECT $1, UNNEST($2::BIGINT[]) ON CONFLICT DO NOTHING",
+                guild.id,
+                member_ids,
+            )
+            return
+
+        await self.db.execute(
+            """WITH current AS (SELECT UNNEST($2::BIGINT[]) AS user_id),
+deleted AS (DELETE FROM guild_members gm WHERE guild_id = $1 AND NOT EXISTS (SELECT 1 FROM current c WHERE c.user_id = gm.user_id))
+INSERT INTO guild_members (guild_id, user_id) SELECT $1, user_id FROM current ON CONFLICT DO NOTHING""",
+            guild.id,
+            member_ids,
+        )
+
+        self.bot.synced_member_guilds.add(guild.id)
+
+    async def add_guild_member(self, guild_id: int, user_id: int) -> None:
+        await self.db.execute(
+            "INSERT INTO guild_members (guild_id, user_id) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+            guild_id,
+            user_id,
+        )
+
+    async def remove_guild_member(self, guild_id: int, user_id: int) -> None:
+        await self.db.execute(
+            "DELETE FROM guild_members WHERE guild_id = $1 AND user_id = $2", guild_id, user_id
+        )
+
+    async def drop_guild_members(self, guild_id: int) -> None:
+        await self.db.execute("DELETE FROM guild_members WHERE guild_id = $1", guild_id)
+        self.bot.synced_member_guilds.discard(guild_id)
+
     async def fetch_guilds_jls(self) -> list[dict[str, Any]]:
         return await self.db.fetch(
             """SELECT COALESCE(event_at, event_at_gs) AS event_at, COALESCE(join_count, 0) - COALESCE(leave_count, 0) AS diff FROM (
@@ -723,14 +799,14 @@ class Database(commands.Cog):
         guild_ids = [g.id for g in self.bot.guilds]
 
         return await self.db.fetch(
-            "SELECT guild_id AS id, COUNT(user_id) AS count FROM (SELECT DISTINCT guild_id, user_id FROM command_executions WHERE guild_id = ANY($1::BIGINT[]) AND ((NOW() - at) < INTERVAL '1 WEEK')) iq GROUP BY guild_id ORDER BY count DESC LIMIT 10",
+            "SELECT guild_id AS id, COUNT(DISTINCT user_id) AS count FROM command_executions_hourly WHERE guild_id = ANY($1::BIGINT[]) AND hour > NOW() - INTERVAL '1 WEEK' GROUP BY guild_id ORDER BY count DESC LIMIT 10",
             guild_ids,
         )
 
     async def fetch_guilds_commands_count(self) -> list[dict[str, Any]]:
         guild_ids = [g.id for g in self.bot.guilds]
         return await self.db.fetch(
-            "SELECT guild_id AS id, COUNT(*) AS count FROM command_executions WHERE guild_id = ANY($1::BIGINT[]) GROUP BY guild_id ORDER BY count DESC LIMIT 10",
+            "SELECT guild_id AS id, SUM(count) AS count FROM command_executions_hourly WHERE guild_id = ANY($1::BIGINT[]) GROUP BY guild_id ORDER BY count DESC LIMIT 10",
             guild_ids,
         )
 
@@ -747,7 +823,10 @@ class Database(commands.Cog):
                         FROM (
                             SELECT user_id, guild_id, at, LAG(at) OVER (
                                 PARTITION BY user_id ORDER BY at ASC
-                            ) FROM command_executions
+                            ) FROM command_executions WHERE user_id IN (
+                                -- only users who ran a command since $2 can have a streak ending after it
+                                SELECT user_id FROM command_executions_hourly WHERE hour >= DATE_TRUNC('HOUR', $2::TIMESTAMPTZ)
+                            )
                         ) iq1
                     ) iq2
                 ) iq3 GROUP BY user_id, group_id ORDER BY duration DESC, group_start DESC
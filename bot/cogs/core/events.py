@@ -12,6 +12,7 @@ from bot.utils.ctx import Ctx
 from bot.utils.misc import (
     CommandOnKarenCooldown,
     MaxKarenConcurrencyReached,
+    RenderQueueFull,
     chunk_by_lines,
     text_to_discord_file,
     update_support_member_role,
@@ -115,7 +116,7 @@ class Events(commands.Cog):
         await self.db.add_guild_join(guild)
 
         # bot's funny replies are on by default
-        self.bot.replies_cache.add(guild.id)
+        self.bot.no_replies_cache.discard(guild.id)
 
         # attempt to set default language based off guild's localization
         if lang := {
@@ -133,14 +134,24 @@ class Events(commands.Cog):
         # log guild leave
         await self.db.add_guild_leave(guild)
 
+        await self.db.drop_guild_members(guild.id)
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         # add user to new member cache
-        self.bot.new_member_cache[member.guild.id].add(member.id)
+        self.bot.new_member_cache.add((member.guild.id, member.id))
+
+        if not member.bot:
+            await self.db.add_guild_member(member.guild.id, member.id)
 
         # if member.guild.id == self.k.support_server_id:
         #     await update_support_member_role(self.bot, member)
 
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if not member.bot:
+            await self.db.remove_guild_member(member.guild.id, member.id)
+
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
         if before.guild.id == self.k.support_server_id:
@@ -278,7 +289,7 @@ class Events(commands.Cog):
                 return
 
         # "funny" replies like creeper -> awwww man
-        if message.guild.id in self.bot.replies_cache:
+        if message.guild.id not in self.bot.no_replies_cache:
             prefix = self.bot.prefix_cache.get(message.guild.id, self.k.default_prefix)
 
             if not message.content.startswith(prefix):
@@ -295,7 +306,9 @@ class Events(commands.Cog):
     ) -> None:
         # handle mine command cooldown effects
         if ctx.command.qualified_name == "mine":
-            if await self.db.fetch_item(ctx.author.id, "Libro Eficiencia I") is not None:
+            if "Libro Eficiencia I" in await self.db.fetch_owned(
+                ctx.author.id, ["Libro Eficiencia I"]
+            ):
                 remaining -= 0.5
 
             active_effects = await self.karen.fetch_active_fx(ctx.author.id)
@@ -366,6 +379,8 @@ class Events(commands.Cog):
             await ctx.reply_embed(ctx.l.misc.errors.bot_perms, ignore_exceptions=True)
         elif isinstance(e, (commands.MaxConcurrencyReached, MaxKarenConcurrencyReached)):
             await ctx.reply_embed(ctx.l.misc.errors.nrn_buddy, ignore_exceptions=True)
+        elif isinstance(getattr(e, "original", None), RenderQueueFull):
+            await ctx.reply_embed(ctx.l.misc.errors.nrn_buddy, ignore_exceptions=True)
         elif isinstance(e, commands.MissingRequiredArgument):
             await ctx.reply_embed(ctx.l.misc.errors.missing_arg, ignore_exceptions=True)
         elif isinstance(e, BAD_ARG_ERRORS):
@@ -1,7 +1,5 @@
 import random
-from contextlib import suppress
 
-import arrow
 import discord
 from discord.ext import commands, tasks
 
@@ -35,14 +33,9 @@ class Loops(commands.Cog):
 
     @tasks.loop(seconds=30)
     async def clear_rcon_cache(self):
-        """clear old connections from the rcon cache"""
+        """clear old connections from the rcon cache, they're closed when evicted"""
 
-        for key, connection in self.bot.rcon_cache.copy().items():
-            if arrow.utcnow().shift(minutes=-1) > connection[1]:
-                with suppress(Exception):
-                    await connection[0].close()
-
-                self.bot.rcon_cache.pop(key, None)
+        self.bot.rcon_cache.clear_expired()
 
     @tasks.loop(hours=24)
     async def update_fishing_prices(self):
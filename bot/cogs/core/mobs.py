@@ -7,6 +7,8 @@ import classyjson as cj
 import discord
 from discord.ext import commands
 
+from common.utils.cache import LRUCache
+
 from bot.cogs.core.database import Database
 from bot.utils.ctx import Ctx
 from bot.utils.misc import SuppressCtxManager, emojify_item, make_health_bar
@@ -20,7 +22,8 @@ class MobSpawner(commands.Cog):
         self.d = bot.d
         self.karen = bot.karen
 
-        self.active_channels = set[int]()
+        # ttl is only a safeguard, channels are removed once their spawn event is over
+        self.active_channels = LRUCache[int, None](10_000, ttl=(10 * 60), name="mob_channels")
 
     @property
     def db(self) -> Database:
@@ -72,9 +75,11 @@ class MobSpawner(commands.Cog):
         else:
             raise ValueError(f"{repr(sword)} is not a valid sword.")
 
-        if await self.db.fetch_item(user_id, "Libro Filo II") is not None:
+        owned = await self.db.fetch_owned(user_id, ["Libro Filo II", "Libro Filo I"])
+
+        if "Libro Filo II" in owned:
             damage *= 1.5
-        elif await self.db.fetch_item(user_id, "Libro Filo I") is not None:
+        elif "Libro Filo I" in owned:
             damage *= 1.25
 
         if multi > 1:
@@ -93,7 +98,7 @@ class MobSpawner(commands.Cog):
         except Exception:
             await self.bot.get_cog("Events").on_error("mob_spawn", ctx)
         finally:
-            self.active_channels.remove(ctx.channel.id)
+            self.active_channels.discard(ctx.channel.id)
 
     async def _spawn_event(self, ctx: Ctx):
         if ctx.guild is None:  # ignore dms
@@ -318,10 +323,12 @@ class MobSpawner(commands.Cog):
             user_bal = db_user.emeralds
 
             # calculate looting level
+            owned = await self.db.fetch_owned(user.id, ["Libro Saqueo II", "Libro Saqueo I"])
+
             looting_level = 0
-            if await self.db.fetch_item(user.id, "Libro Saqueo II") is not None:
+            if "Libro Saqueo II" in owned:
                 looting_level = 2
-            elif await self.db.fetch_item(user.id, "Libro Saqueo I") is not None:
+            elif "Libro Saqueo I" in owned:
                 looting_level = 1
 
             if user_health > 0:  # user win
@@ -1,9 +1,18 @@
-import base64
-import json
+"""Generates the tiler's block atlas and color lookup table from a folder of block textures
+
+Usage: python -m bot.data.blockifier_generator <textures dir> [--resolution 16] [--atlas out.npy]
+       [--lut out.npy] [--workers N] [--verbose]
+"""
+
+import argparse
 import os
 from multiprocessing import Pool
+from typing import Optional
 
 import cv2
+import numpy as np
+
+from bot.utils.tiler_engine import build_atlas, build_lut, tile_colors
 
 IGNORE = [
     "_bottom",
@@ -12,7 +21,8 @@ IGNORE = [
     "_left",
     "_inner",
     "_on",
-    "_off" "_front",
+    "_off",
+    "_front",
     "_back",
     "_stage",
     "_middle",
@@ -34,113 +44,114 @@ IGNORE = [
 ]
 
 
+def load_tile(path: str, resolution: int) -> Optional[np.ndarray]:
+    """Reads a texture as a BGR tile, or returns None if it's unusable (unreadable, the wrong size or
+    not fully opaque)"""
+
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+
+    if img is None or img.shape[:2] != (resolution, resolution):
+        return None
+
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+    if img.shape[2] == 4:
+        if (img[..., 3] < 255).any():
+            return None
+
+        return np.ascontiguousarray(img[..., :3])
+
+    return img
+
+
+def _load_tile(args: tuple[str, int]) -> Optional[np.ndarray]:
+    return load_tile(*args)
+
+
 class Palette:
-    def __init__(self, *, resolution: int = 16, source_dir: str = ".", verbose: bool = False):
-        self.source_dir = source_dir + (
-            "" if source_dir.endswith("/") or source_dir.endswith("\\") else "\\"
-        )
-        self.dest_dims = (resolution, resolution)
-        self.data = None
+    def __init__(
+        self,
+        *,
+        resolution: int = 16,
+        source_dir: str = ".",
+        workers: Optional[int] = None,
+        verbose: bool = False,
+    ):
+        self.source_dir = source_dir
+        self.resolution = resolution
+        self.workers = workers or os.cpu_count()
         self.verbose = verbose
 
-    def generate(self):
-        if self.verbose:
-            print("Processing images...")
+        self.tile_names: Optional[list[str]] = None
+        self.atlas: Optional[np.ndarray] = None
 
+    def find_images(self) -> list[str]:
         image_files = []
 
-        for f in [
-            *filter(
-                (lambda file: (file.endswith(".png") or file.endswith(".jpg"))),
-                next(os.walk(self.source_dir))[2],
-            )
-        ]:
-            c = False
+        for f in sorted(os.listdir(self.source_dir)):
+            if not (f.endswith(".png") or f.endswith(".jpg")):
+                continue
 
-            for i in IGNORE:
-                if i in f:
+            if any(i in f for i in IGNORE):
+                if self.verbose:
                     print(f"CAUGHT: {f}")
-                    c = True
-                    break
-
-            if not c:
-                image_files.append(f)
-
-        with Pool(8) as pool:
-            raw_p = [*filter((lambda e: bool(e)), pool.map(self.pal_from_image, image_files))]
-
-        map_bi = []
-        map_quad = []
-        map_oct = []
-        palette = {}
-
-        for res in raw_p:
-            map_bi.append(res[0])
-            map_quad.append(res[1])
-            map_oct.append(res[2])
-            palette.update(res[3])
-
-        self.data = {
-            "dims": self.dest_dims,
-            "bi": map_bi,
-            "quad": map_quad,
-            "oct": map_oct,
-            "palette": palette,
-        }
 
-        if self.verbose:
-            print(f'Done! ({len(self.data["palette"])})')
+                continue
 
-    def pal_from_image(self, image_file):
-        if self.verbose:
-            print(f"Processing: {image_file}")
+            image_files.append(f)
 
-        img = cv2.imread(self.source_dir + image_file, cv2.IMREAD_UNCHANGED)
+        return image_files
 
-        if img is None:
-            return False
+    def generate(self):
+        image_files = self.find_images()
 
-        # ignore any images with transparency
-        if img.shape[2] == 4:
-            for row in img:
-                for pixel in row:
-                    if pixel[3] < 255:
-                        return False
+        if self.verbose:
+            print(f"Processing {len(image_files)} images...")
 
-        img = cv2.imread(self.source_dir + image_file, cv2.IMREAD_COLOR)
+        with Pool(self.workers) as pool:
+            tiles = pool.map(
+                _load_tile,
+                [(os.path.join(self.source_dir, f), self.resolution) for f in image_files],
+                chunksize=32,
+            )
 
-        if img.shape[1] != self.dest_dims[1] or img.shape[0] != self.dest_dims[0]:
-            # img = cv2.resize(img, self.dest_dims)
-            return False
+        loaded = [(f, tile) for f, tile in zip(image_files, tiles) if tile is not None]
 
-        p_count = 0
-        avgs = [0] * img.shape[2]
+        self.tile_names = [f for f, _ in loaded]
+        self.atlas = build_atlas([tile for _, tile in loaded])
 
-        for row in img:
-            for pixel in row:
-                for i in range(img.shape[2]):
-                    avgs[i] += pixel[i]
+        if self.verbose:
+            print(f"Done! ({len(self.tile_names)})")
 
-                p_count += 1
+    def save(self, atlas_file: str, lut_file: str):
+        """Saves the tiles as one contiguous (tiles, height, width, 3) array and the color lookup table,
+        both as .npy files so the tiler can memory-map them"""
 
-        for i in range(img.shape[2]):
-            avgs[i] /= p_count
+        np.save(atlas_file, self.atlas)
+        # tiles are matched by their mean color in Lab space, so by how similar they look
+        np.save(lut_file, build_lut(tile_colors(self.atlas)))
 
-        # avgs.reverse()
 
-        b = base64.b64encode(cv2.imencode(".png", img)[1]).decode("utf-8")
+def main(args: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generates the tiler's block atlas and lut")
+    parser.add_argument("source_dir", help="folder of block textures, e.g. from a resource pack")
+    parser.add_argument("--resolution", type=int, default=16)
+    parser.add_argument("--atlas", default="bot/data/block_atlas.npy")
+    parser.add_argument("--lut", default="bot/data/block_lut.npy")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    parsed = parser.parse_args(args)
 
-        return (
-            [[int(avg / 128) for avg in avgs], image_file],
-            [[int(avg / 64) for avg in avgs], image_file],
-            [[int(avg / 32) for avg in avgs], image_file],
-            {image_file: b},
-        )
+    palette = Palette(
+        resolution=parsed.resolution,
+        source_dir=parsed.source_dir,
+        workers=parsed.workers,
+        verbose=parsed.verbose,
+    )
+    palette.generate()
+    palette.save(parsed.atlas, parsed.lut)
 
 
 if __name__ == "__main__":
-    p = Palette(verbose=True)
-    p.generate()
-
-    with open("0_out.json", "w+") as f:
-        json.dump(p.data, f)
+    main()
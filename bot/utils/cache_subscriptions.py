@@ -0,0 +1,35 @@
+from typing import Any, Callable
+
+from common.data.enums.cache_topic import CacheTopic
+from common.utils.cache import LRUCache
+
+T_CACHE_HANDLER = Callable[[int, Any], None]
+
+
+class CacheSubscriptions:
+    """Applies cache invalidations published through Karen to the caches subscribed to their topic
+
+    Every invalidation carries a version assigned by Karen, invalidations which are older than the
+    last one applied for the same topic and key are dropped, as packets can be handled out of order.
+    Only the versions of the most recently invalidated keys are remembered, as reordering only happens
+    between packets sent close together."""
+
+    def __init__(self, max_versions: int = 100_000):
+        self._handlers = dict[CacheTopic, list[T_CACHE_HANDLER]]()
+        self._versions = LRUCache[tuple[CacheTopic, int], int](
+            max_versions, name="cache_versions"
+        )  # (topic, key): version
+
+    def subscribe(self, topic: CacheTopic, handler: T_CACHE_HANDLER) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def dispatch(self, topic: CacheTopic, key: int, value: Any, version: int) -> bool:
+        if version <= self._versions.get((topic, key), 0):
+            return False
+
+        self._versions[(topic, key)] = version
+
+        for handler in self._handlers.get(topic, []):
+            handler(key, value)
+
+        return True
@@ -1,27 +1,77 @@
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
 
-from bot.utils.karen_client import KarenClient
+from common.utils.command_usage import record_db_query
+
+from bot.utils.karen_client import KarenClient, KarenResponseError
+
+T = TypeVar("T")
 
 
 class DatabaseProxy:
     """Provides an API similar to that of an asyncpg.Pool but proxies calls through Karen"""
 
-    __slots__ = ("karen",)
+    __slots__ = ("karen", "_query_ids")
 
     def __init__(self, karen: KarenClient):
         self.karen = karen
 
+        self._query_ids = dict[str, int]()  # query: query_id
+
+    async def prepare(self, query: str) -> int:
+        """Registers the query with Karen, afterwards only its id has to be sent"""
+
+        query_id = self._query_ids.get(query)
+
+        if query_id is None:
+            query_id = self._query_ids[query] = await self.karen.db_prepare(query)
+
+        return query_id
+
+    async def _call(self, method: Callable[..., Awaitable[T]], query: str, *args: Any) -> T:
+        record_db_query()
+
+        try:
+            return await method(await self.prepare(query), *args)
+        except KarenResponseError as e:
+            # Karen was restarted and has forgotten the query, so register it again
+            if not (
+                isinstance(e.packet.data, str) and e.packet.data.startswith("UnknownQueryError(")
+            ):
+                raise
+
+        self._query_ids.pop(query, None)
+        return await method(await self.prepare(query), *args)
+
     async def execute(self, query: str, *args: Any) -> None:
-        await self.karen.db_exec(query, *args)
+        await self._call(self.karen.db_exec, query, *args)
 
     async def executemany(self, query: str, args: list[list[Any]]) -> None:
-        await self.karen.db_exec_many(query, args)
+        await self._call(self.karen.db_exec_many, query, args)
 
     async def fetchval(self, query: str, *args: Any) -> Any:
-        return await self.karen.db_fetch_val(query, *args)
+        return await self._call(self.karen.db_fetch_val, query, *args)
 
     async def fetchrow(self, query: str, *args: Any) -> Optional[dict[str, Any]]:
-        return await self.karen.db_fetch_row(query, *args)
+        return await self._call(self.karen.db_fetch_row, query, *args)
 
     async def fetch(self, query: str, *args: Any) -> list[dict[str, Any]]:
-        return await self.karen.db_fetch_all(query, *args)
+        return await self._call(self.karen.db_fetch_all, query, *args)
+
+    async def cursor(
+        self, query: str, *args: Any, chunk_size: int = 1000
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Iterates over the results of the query, fetching them from Karen chunk_size rows at a time"""
+
+        cursor_id = await self._call(self.karen.db_cursor_open, query, *args)
+        exhausted = False
+
+        try:
+            while not exhausted:
+                records = await self.karen.db_cursor_fetch(cursor_id, chunk_size)
+                exhausted = len(records) < chunk_size  # Karen closes exhausted cursors itself
+
+                for record in records:
+                    yield record
+        finally:
+            if not exhausted:
+                await self.karen.db_cursor_close(cursor_id)
@@ -0,0 +1,105 @@
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class DiskCache:
+    """Size-bounded store of bytes in a directory, which evicts the least recently used files when full
+
+    The directory is scanned on init so entries survive restarts. Operations do blocking file io, so
+    they should be ran in a thread."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._sizes = OrderedDict[str, int]()  # key: file size, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+
+            if entry.name.startswith("."):  # left over from an interrupted write
+                os.remove(entry.path)
+                continue
+
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        if key not in self._sizes:
+            self.misses += 1
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._total_bytes -= self._sizes.pop(key)
+            self.misses += 1
+            return None
+
+        os.utime(self._path(key))  # so the order is kept across restarts
+        self._sizes.move_to_end(key)
+        self.hits += 1
+
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        # written to a temporary file first so a crash never leaves a partial entry behind
+        tmp_path = self._path(f".{key}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        self._total_bytes += len(data) - self._sizes.pop(key, 0)
+        self._sizes[key] = len(data)
+
+        self._evict()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._sizes),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -1,3 +1,4 @@
+import datetime
 import logging
 import time
 from typing import Any, Optional
@@ -8,8 +9,10 @@ from common.coms.client import Client
 from common.coms.packet import T_PACKET_DATA, Packet
 from common.coms.packet_handling import PacketHandler
 from common.coms.packet_type import PacketType
+from common.data.enums.cache_topic import CacheTopic
 from common.models.secrets import KarenSecrets
 from common.models.system_stats import SystemStats
+from common.utils.command_usage import record_karen_packet
 from common.utils.validate_return_type import validate_return_type
 
 from bot.models.karen.cluster_info import ClusterInfo
@@ -48,7 +51,9 @@ class KarenClient:
         self.logger.info("Disconnected from Karen")
 
     async def _send(self, packet_type: PacketType, **kwargs: T_PACKET_DATA) -> T_PACKET_DATA:
+        start = time.perf_counter()
         resp = await self._client.send(packet_type, kwargs)
+        record_karen_packet(time.perf_counter() - start)
 
         if resp.error:
             raise KarenResponseError(resp)
@@ -58,7 +63,9 @@ class KarenClient:
     async def _broadcast(
         self, packet_type: PacketType, **kwargs: T_PACKET_DATA
     ) -> list[T_PACKET_DATA]:
+        start = time.perf_counter()
         resp = await self._client.broadcast(packet_type, kwargs)
+        record_karen_packet(time.perf_counter() - start)
 
         if resp.error:
             raise KarenResponseError(resp)
@@ -68,7 +75,9 @@ class KarenClient:
     async def _broadcast_aggregate(
         self, packet_type: PacketType, **kwargs: T_PACKET_DATA
     ) -> list[T_PACKET_DATA]:
+        start = time.perf_counter()
         resp = await self._client.broadcast(packet_type, kwargs)
+        record_karen_packet(time.perf_counter() - start)
 
         aggregate = []
         for r in resp.data:
@@ -165,24 +174,80 @@ class KarenClient:
         await self._send(PacketType.ACTIVE_FX_CLEAR, user_id=user_id)
 
     @validate_return_type
-    async def db_exec(self, query: str, *args: Any) -> None:
-        await self._send(PacketType.DB_EXEC, query=query, args=args)
+    async def db_prepare(self, query: str) -> int:
+        return await self._send(PacketType.DB_PREPARE, query=query)
 
     @validate_return_type
-    async def db_exec_many(self, query: str, args: list[list[Any]]) -> None:
-        await self._send(PacketType.DB_EXEC_MANY, query=query, args=args)
+    async def db_exec(self, query_id: int, *args: Any) -> None:
+        await self._send(PacketType.DB_EXEC, query_id=query_id, args=args)
 
     @validate_return_type
-    async def db_fetch_val(self, query: str, *args: Any) -> Any:
-        return await self._send(PacketType.DB_FETCH_VAL, query=query, args=args)
+    async def db_exec_many(self, query_id: int, args: list[list[Any]]) -> None:
+        await self._send(PacketType.DB_EXEC_MANY, query_id=query_id, args=args)
 
     @validate_return_type
-    async def db_fetch_row(self, query: str, *args: Any) -> Optional[dict[str, Any]]:
-        return await self._send(PacketType.DB_FETCH_ROW, query=query, args=args)
+    async def db_fetch_val(self, query_id: int, *args: Any) -> Any:
+        return await self._send(PacketType.DB_FETCH_VAL, query_id=query_id, args=args)
 
     @validate_return_type
-    async def db_fetch_all(self, query: str, *args: Any) -> list[dict[str, Any]]:
-        return await self._send(PacketType.DB_FETCH_ALL, query=query, args=args)
+    async def db_fetch_row(self, query_id: int, *args: Any) -> Optional[dict[str, Any]]:
+        return await self._send(PacketType.DB_FETCH_ROW, query_id=query_id, args=args)
+
+    @validate_return_type
+    async def db_fetch_all(self, query_id: int, *args: Any) -> list[dict[str, Any]]:
+        return await self._send(PacketType.DB_FETCH_ALL, query_id=query_id, args=args)
+
+    @validate_return_type
+    async def db_cursor_open(self, query_id: int, *args: Any) -> int:
+        return await self._send(PacketType.DB_CURSOR_OPEN, query_id=query_id, args=args)
+
+    @validate_return_type
+    async def db_cursor_fetch(self, cursor_id: int, n: int) -> list[dict[str, Any]]:
+        return await self._send(PacketType.DB_CURSOR_FETCH, cursor_id=cursor_id, n=n)
+
+    @validate_return_type
+    async def db_cursor_close(self, cursor_id: int) -> None:
+        await self._send(PacketType.DB_CURSOR_CLOSE, cursor_id=cursor_id)
+
+    @validate_return_type
+    async def reminder_add(
+        self,
+        user_id: int,
+        guild_id: Optional[int],
+        channel_id: int,
+        message_id: int,
+        reminder: str,
+        at: datetime.datetime,
+    ) -> None:
+        await self._send(
+            PacketType.REMINDER_ADD,
+            user_id=user_id,
+            guild_id=guild_id,
+            channel_id=channel_id,
+            message_id=message_id,
+            reminder=reminder,
+            at=at,
+        )
+
+    @validate_return_type
+    async def fetch_query_stats(self, limit: int) -> list[dict[str, Any]]:
+        return await self._send(PacketType.FETCH_QUERY_STATS, limit=limit)
+
+    @validate_return_type
+    async def leaderboard_update(self, user_id: int, lb: str, value: int, mode: str) -> int:
+        return await self._send(
+            PacketType.LEADERBOARD_UPDATE, user_id=user_id, lb=lb, value=value, mode=mode
+        )
+
+    @validate_return_type
+    async def leaderboard_sync_user(self, user_id: int) -> None:
+        await self._send(PacketType.LEADERBOARD_SYNC_USER, user_id=user_id)
+
+    @validate_return_type
+    async def fetch_leaderboard(
+        self, lb: str, user_id: int, limit: int = 10
+    ) -> list[dict[str, Any]]:
+        return await self._send(PacketType.LEADERBOARD_FETCH, lb=lb, user_id=user_id, limit=limit)
 
     @validate_return_type
     async def get_user_name(self, user_id: int) -> Optional[str]:
@@ -215,12 +280,10 @@ class KarenClient:
         return await self._broadcast(PacketType.EXEC_CODE, code=code)
 
     @validate_return_type
-    async def botban_cache_add(self, user_id: int) -> None:
-        await self._broadcast(PacketType.BOTBAN_CACHE_ADD, user_id=user_id)
+    async def publish_cache_invalidation(self, topic: CacheTopic, key: int, value: Any) -> None:
+        """Applies the new value to the cache of every cluster, returns once all have done so"""
 
-    @validate_return_type
-    async def botban_cache_remove(self, user_id: int) -> None:
-        await self._broadcast(PacketType.BOTBAN_CACHE_REMOVE, user_id=user_id)
+        await self._send(PacketType.CACHE_INVALIDATE, topic=topic, key=key, value=value)
 
     @validate_return_type
     async def lookup_user(self, user_id: int) -> list[list[int | str]]:
@@ -230,6 +293,10 @@ class KarenClient:
     async def fetch_clusters_system_stats(self) -> list[SystemStats]:
         return [SystemStats(**r) for r in await self._broadcast(PacketType.FETCH_SYSTEM_STATS)]
 
+    @validate_return_type
+    async def fetch_clusters_command_usage(self) -> list[dict[str, Any]]:
+        return await self._broadcast_aggregate(PacketType.FETCH_COMMAND_USAGE)
+
     @validate_return_type
     async def fetch_clusters_bot_stats(self) -> list[list]:
         return await self._broadcast(PacketType.FETCH_BOT_STATS)
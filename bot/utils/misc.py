@@ -14,6 +14,7 @@ import discord
 
 from common.models.db.item import Item
 from common.models.db.user import User
+from common.utils.cache import LRUCache
 from common.utils.code import format_exception
 
 
@@ -247,21 +248,19 @@ async def update_support_member_role(bot, member):
 
 
 class TTLPreventDuplicate:
-    def __init__(self, expire_after: float):
+    def __init__(self, expire_after: float, max_size: int = 10_000):
         self.expire_after = expire_after
 
-        self.store = {}
+        self.store = LRUCache[Any, None](max_size, ttl=expire_after)
 
     def put(self, obj):
-        self.store[obj] = time.time()
+        self.store.add(obj)
 
     def check(self, obj):
         return obj in self.store
 
     def clear_dead(self) -> None:
-        for k, v in list(self.store.items()):
-            if (time.time() - v) > self.expire_after:
-                del self.store[k]
+        self.store.clear_expired()
 
 
 def fix_giphy_url(url: str) -> str:
@@ -345,6 +344,10 @@ class MaxKarenConcurrencyReached(Exception):
     pass
 
 
+class RenderQueueFull(Exception):
+    """Raised when a user already has the max amount of renders queued, or the whole queue is full"""
+
+
 def shorten_text(text: str, to: int = 2000) -> str:
     if len(text) > to:
         return text[: to - 1] + "…"
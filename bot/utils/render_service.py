@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from common.utils.cache import LRUCache
+
+from bot.utils.disk_cache import DiskCache
+from bot.utils.misc import RenderQueueFull
+from bot.utils.tiler import Tiler
+
+# the tiler of the current worker process, loaded once by _init_worker
+_tiler: Optional[Tiler] = None
+
+
+def _init_worker(atlas_file: str, lut_file: str) -> None:
+    global _tiler
+    _tiler = Tiler(atlas_file, lut_file)
+
+
+def _convert_image(source_bytes: bytes, max_dim: float, detailed: bool) -> bytes:
+    return _tiler.convert_image(source_bytes, max_dim, detailed).getvalue()
+
+
+def _convert_video(source_bytes: bytes, max_dim: float, detailed: bool) -> bytes:
+    return _tiler.convert_video(source_bytes, max_dim, detailed).getvalue()
+
+
+class RenderService:
+    """Runs the tiler in a pool of worker processes so renders don't block the event loop
+
+    At most max_queued renders (including running ones) are accepted at once, and at most max_per_user
+    of those can belong to the same user. Converted images are cached by the hash of their input, in
+    memory and on disk."""
+
+    def __init__(
+        self,
+        atlas_file: str,
+        lut_file: str,
+        *,
+        workers: int,
+        max_queued: int,
+        max_per_user: int,
+        memory_cache_size: int,
+        disk_cache_dir: str,
+        disk_cache_bytes: int,
+    ):
+        self.max_queued = max_queued
+        self.max_per_user = max_per_user
+
+        # spawned, forking a process with a running event loop and open sockets isn't safe
+        self._executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(atlas_file, lut_file),
+        )
+        self._workers = asyncio.Semaphore(workers)
+
+        self._pending = defaultdict[int, int](int)  # user_id: renders queued or running
+        self._pending_total = 0
+
+        # {(sha256 of input, max_dim, detailed): png bytes}
+        self.memory_cache = LRUCache[tuple[str, float, bool], bytes](
+            memory_cache_size, name="renders"
+        )
+        self.disk_cache = DiskCache(disk_cache_dir, disk_cache_bytes)
+        self._disk_cache_lock = asyncio.Lock()  # the disk cache's bookkeeping isn't thread safe
+
+        self.renders = 0
+        self.failures = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_render_time = 0.0
+        self.max_render_time = 0.0
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _render(self, user_id: int, func: Callable[..., bytes], *args: Any) -> io.BytesIO:
+        if (
+            self._pending_total >= self.max_queued
+            or self._pending.get(user_id, 0) >= self.max_per_user
+        ):
+            raise RenderQueueFull()
+
+        self._pending[user_id] += 1
+        self._pending_total += 1
+
+        try:
+            queued_at = time.perf_counter()
+
+            async with self._workers:
+                started_at = time.perf_counter()
+
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, func, *args
+                    )
+                except Exception:
+                    self.failures += 1
+                    raise
+
+                finished_at = time.perf_counter()
+        finally:
+            self._pending[user_id] -= 1
+            self._pending_total -= 1
+
+            if not self._pending[user_id]:
+                del self._pending[user_id]
+
+        self.renders += 1
+        self.total_wait_time += started_at - queued_at
+        self.max_wait_time = max(self.max_wait_time, started_at - queued_at)
+        self.total_render_time += finished_at - started_at
+        self.max_render_time = max(self.max_render_time, finished_at - started_at)
+
+        return io.BytesIO(result)
+
+    async def convert_image(
+        self, user_id: int, source_bytes: bytes, max_dim: float, detailed: bool
+    ) -> io.BytesIO:
+        key = (hashlib.sha256(source_bytes).hexdigest(), max_dim, detailed)
+        disk_key = f"{key[0]}-{max_dim:g}-{int(detailed)}.png"
+
+        if (cached := self.memory_cache.get(key)) is not None:
+            return io.BytesIO(cached)
+
+        async with self._disk_cache_lock:
+            cached = await asyncio.to_thread(self.disk_cache.get, disk_key)
+
+        if cached is not None:
+            self.memory_cache[key] = cached
+            return io.BytesIO(cached)
+
+        result = await self._render(user_id, _convert_image, source_bytes, max_dim, detailed)
+        self.memory_cache[key] = result.getvalue()
+
+        async with self._disk_cache_lock:
+            await asyncio.to_thread(self.disk_cache.set, disk_key, result.getvalue())
+
+        return result
+
+    async def convert_video(
+        self, user_id: int, source_bytes: bytes, max_dim: float, detailed: bool
+    ) -> io.BytesIO:
+        return await self._render(user_id, _convert_video, source_bytes, max_dim, detailed)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._pending_total,
+            "renders": self.renders,
+            "failures": self.failures,
+            "mean_wait_time": (self.total_wait_time / self.renders) if self.renders else 0.0,
+            "max_wait_time": self.max_wait_time,
+            "mean_render_time": (self.total_render_time / self.renders) if self.renders else 0.0,
+            "max_render_time": self.max_render_time,
+            "memory_cache": self.memory_cache.stats(),
+            "disk_cache": self.disk_cache.stats(),
+        }
@@ -0,0 +1,114 @@
+import io
+from typing import Iterable, Iterator
+
+import cv2
+import imageio
+import numpy as np
+
+from bot.utils.tiler_engine import map_blocks
+
+VIDEO_MAX_FPS = 15
+VIDEO_MAX_FRAMES = 150
+
+
+class Tiler:
+    def __init__(self, atlas_file: str, lut_file: str):
+        # memory-mapped so every cluster on the machine shares the same pages
+        self.atlas: np.ndarray = np.load(atlas_file, mmap_mode="r")
+        self.lut: np.ndarray = np.load(lut_file, mmap_mode="r")
+
+        self.atlas_rgb = np.ascontiguousarray(self.atlas[..., ::-1])  # for gif frames
+
+        self.yi, self.xi = self.atlas.shape[1:3]
+
+    def image_from_bytes(self, b: bytes) -> np.ndarray:
+        return cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR)
+
+    def prep_image(self, source: np.ndarray, max_dim: float, detailed: bool) -> np.ndarray:
+        sw = source.shape[1]
+        sh = source.shape[0]
+
+        t = 512
+
+        # rescale if too big
+        if sw > max_dim or sh > max_dim or detailed:
+            ratio = sw / sh
+
+            if sw > sh:
+                new_w = max_dim
+                new_h = new_w / ratio
+            elif sw == sh:
+                new_w = max_dim
+                new_h = max_dim
+            else:
+                new_h = max_dim
+                new_w = new_h * ratio
+
+            source = cv2.resize(source, (int(new_w), int(new_h)))
+        elif sw < t or sh < t:
+            ratio = sw / sh
+
+            if sw > sh:
+                new_w = t
+                new_h = new_w / ratio
+            elif sw == sh:
+                new_w = t
+                new_h = t
+            else:
+                new_h = t
+                new_w = new_h * ratio
+
+            source = cv2.resize(source, (int(new_w), int(new_h)))
+
+        return cv2.resize(source, (source.shape[1] // self.xi, source.shape[0] // self.yi))
+
+    def _convert_image(self, source: np.ndarray) -> np.ndarray:
+        return map_blocks(source, self.lut, self.atlas)
+
+    def convert_image(self, source_bytes: bytes, max_dim: float, detailed: bool) -> io.BytesIO:
+        source = self.image_from_bytes(source_bytes)
+        del source_bytes  # saves memory
+        source = self.prep_image(source, max_dim, detailed)
+
+        return io.BytesIO(cv2.imencode(".png", self._convert_image(source))[1])
+
+    def convert_video(self, source_bytes: bytes, max_dim: float, detailed: bool) -> io.BytesIO:
+        out_bytes_io = io.BytesIO()
+
+        # frames are read lazily from memory and written to the gif as they're converted, so only
+        # one frame is held at a time
+        with imageio.get_reader(source_bytes, format=_video_format(source_bytes)) as reader:
+            meta = reader.get_meta_data()
+            source_fps = meta.get("fps") or (1000 / meta["duration"] if meta.get("duration") else 0)
+            fps = min(source_fps, VIDEO_MAX_FPS) or VIDEO_MAX_FPS
+
+            with imageio.get_writer(out_bytes_io, format="gif", mode="I", fps=fps) as writer:
+                for frame in _skip_frames(reader, source_fps, fps):
+                    # imageio frames are RGB(A), the lut is indexed by BGR colors
+                    frame = self.prep_image(frame[..., 2::-1], max_dim, detailed)
+                    writer.append_data(map_blocks(frame, self.lut, self.atlas_rgb))
+
+        out_bytes_io.seek(0)
+
+        return out_bytes_io
+
+
+def _video_format(source_bytes: bytes) -> str:
+    return ".gif" if source_bytes[:4] == b"GIF8" else ".mp4"
+
+
+def _skip_frames(
+    frames: Iterable[np.ndarray], source_fps: float, fps: float
+) -> Iterator[np.ndarray]:
+    """Yields just enough frames to play at the given fps, up to VIDEO_MAX_FRAMES of them"""
+
+    step = (source_fps / fps) if source_fps > fps else 1
+    yielded = 0
+
+    for i, frame in enumerate(frames):
+        if i >= yielded * step:
+            yield frame
+            yielded += 1
+
+            if yielded >= VIDEO_MAX_FRAMES:
+                break
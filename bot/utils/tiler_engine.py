@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+# colors are quantized to 5 bits per channel, so the lookup table has 32 * 32 * 32 entries
+LUT_BITS = 5
+LUT_SIZE = 1 << (LUT_BITS * 3)
+
+LUT_CHUNK_SIZE = 4096  # lookup table cells matched against the tiles at once, bounds memory usage
+
+
+def to_lab(pixels: np.ndarray) -> np.ndarray:
+    """Converts uint8 BGR pixels of any shape (..., 3) to float32 CIE Lab"""
+
+    flat = pixels.reshape(1, -1, 3).astype(np.float32) / 255
+    return cv2.cvtColor(flat, cv2.COLOR_BGR2Lab).reshape(pixels.shape)
+
+
+def tile_colors(atlas: np.ndarray) -> np.ndarray:
+    """Returns the mean Lab color of every tile in the atlas, shape (tiles, 3)"""
+
+    return to_lab(atlas).reshape(atlas.shape[0], -1, 3).mean(axis=1)
+
+
+def build_lut(colors: np.ndarray) -> np.ndarray:
+    """Builds a lookup table of quantized color -> index of the perceptually nearest tile color
+
+    Each cell is matched by the Lab color at its center, brute force is fine since there are only a
+    few hundred tiles and the table is built once by the palette generator."""
+
+    levels = np.arange(1 << LUT_BITS, dtype=np.uint16)
+    centers = ((levels << (8 - LUT_BITS)) + (1 << (7 - LUT_BITS))).astype(np.uint8)
+    cells = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1)
+    cells = to_lab(cells.reshape(-1, 3))
+
+    lut = np.empty(LUT_SIZE, np.intp)
+
+    for i in range(0, LUT_SIZE, LUT_CHUNK_SIZE):
+        chunk = cells[i : i + LUT_CHUNK_SIZE]
+        distances = ((chunk[:, None, :] - colors[None, :, :]) ** 2).sum(axis=-1)
+        lut[i : i + LUT_CHUNK_SIZE] = distances.argmin(axis=1)
+
+    return lut
+
+
+def build_atlas(tiles: list[np.ndarray]) -> np.ndarray:
+    """Stacks equally sized tiles into an array of shape (tiles, height, width, channels)"""
+
+    return np.stack(tiles)
+
+
+def map_blocks(source: np.ndarray, lut: np.ndarray, atlas: np.ndarray) -> np.ndarray:
+    """Replaces every pixel of the (height, width, 3) uint8 source image with its tile from the atlas"""
+
+    quantized = (source >> (8 - LUT_BITS)).astype(np.intp)
+    tile_idxs = lut[
+        (quantized[..., 0] << (LUT_BITS * 2)) | (quantized[..., 1] << LUT_BITS) | quantized[..., 2]
+    ]
+
+    h, w = tile_idxs.shape
+    _, th, tw, channels = atlas.shape
+
+    # (h, w, th, tw, c) -> (h, th, w, tw, c) -> (h * th, w * tw, c)
+    return atlas[tile_idxs].transpose(0, 2, 1, 3, 4).reshape(h * th, w * tw, channels)
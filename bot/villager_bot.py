@@ -1,6 +1,7 @@
 import asyncio
 import random
 from collections import defaultdict
+from contextlib import suppress
 from typing import Any, Optional
 
 import aiohttp
@@ -12,15 +13,24 @@ from discord.ext import commands
 from common.coms.packet import PACKET_DATA_TYPES
 from common.coms.packet_handling import PacketHandlerRegistry, handle_packet
 from common.coms.packet_type import PacketType
+from common.data.enums.cache_topic import CacheTopic
 from common.models.data import Data
 from common.models.system_stats import SystemStats
 from common.models.topgg_vote import TopggVote
+from common.utils.cache import LRUCache
 from common.utils.code import execute_code
+from common.utils.command_usage import (
+    CommandUsageStats,
+    QueryBudgetExceededError,
+    current_usage,
+    start_command,
+)
 from common.utils.setup import load_data, setup_logging
 
 from bot.models.fwd_dm import ForwardedDirectMessage
 from bot.models.secrets import Secrets
 from bot.models.translation import Translation
+from bot.utils.cache_subscriptions import CacheSubscriptions
 from bot.utils.ctx import CustomContext
 from bot.utils.database_proxy import DatabaseProxy
 from bot.utils.karen_client import KarenClient
@@ -84,15 +94,27 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
         self.disabled_commands = defaultdict[int, set[str]](
             set
         )  # {guild_id: set({command, command,..})}
-        self.replies_cache = set[int]()  # {guild_id, guild_id,..}
-        self.rcon_cache = dict[tuple[int, Any], Any]()  # {(user_id, mc_server): rcon_client}
-        self.new_member_cache = defaultdict[int, set](set)  # {guild_id: set()}
-        self.existing_users_cache = set[
-            int
-        ]()  # so the database doesn't have to make a query every time an econ command is ran to ensure user exists
-        self.existing_user_lbs_cache = set[
-            int
-        ]()  # for same reason above, but for leaderboards instead
+        self.no_replies_cache = set[int]()  # {guild_id, guild_id,..} replies are on by default
+        self.rcon_cache = LRUCache[tuple[int, Any], Any](
+            1_000, ttl=60, name="rcon", on_evict=self._close_rcon_connection
+        )  # {(user_id, mc_server): rcon_client}
+        self.new_member_cache = LRUCache[tuple[int, int], None](
+            100_000, ttl=(24 * 60 * 60), name="new_members"
+        )  # {(guild_id, user_id),..}
+        self.synced_member_guilds = set[int]()  # guilds whose guild_members rows are up to date
+        self.existing_users_cache = LRUCache[int, None](
+            10_000, name="existing_users"
+        )  # so the database doesn't have to make a query every time an econ command is ran to ensure user exists
+
+        # keeps the caches above in sync across clusters
+        self.cache_subscriptions = CacheSubscriptions()
+        self.cache_subscriptions.subscribe(CacheTopic.BOTBAN, self._update_botban_cache)
+        self.cache_subscriptions.subscribe(CacheTopic.GUILD_PREFIX, self._update_prefix_cache)
+        self.cache_subscriptions.subscribe(CacheTopic.GUILD_LANGUAGE, self._update_language_cache)
+        self.cache_subscriptions.subscribe(CacheTopic.GUILD_REPLIES, self._update_replies_cache)
+        self.cache_subscriptions.subscribe(
+            CacheTopic.GUILD_DISABLED_COMMANDS, self._update_disabled_commands_cache
+        )
 
         self.support_server: Optional[discord.Guild] = None
         self.error_channel: Optional[discord.TextChannel] = None
@@ -103,6 +125,7 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
         self.message_count = 0
         self.error_count = 0
         self.session_votes = 0
+        self.command_usage_stats = CommandUsageStats()  # karen packets & db queries per command
 
         self.final_ready = asyncio.Event()
 
@@ -115,6 +138,58 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
         )  # register self.after_command_invoked as a after_invoked event
         self.event(self.on_app_command_completion)
 
+    def is_own_guild(self, guild_id: int) -> bool:
+        """Whether the guild is on one of this cluster's shards"""
+
+        if self.shard_count is None:  # cluster info hasn't been fetched yet
+            return True
+
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    def _close_rcon_connection(self, key: tuple[int, Any], connection: Any) -> None:
+        async def close():
+            with suppress(Exception):
+                await connection.close()
+
+        asyncio.create_task(close())
+
+    def _update_botban_cache(self, user_id: int, botbanned: bool) -> None:
+        if botbanned:
+            self.botban_cache.add(user_id)
+        else:
+            self.botban_cache.discard(user_id)
+
+    def _update_prefix_cache(self, guild_id: int, prefix: str) -> None:
+        if not self.is_own_guild(guild_id):
+            return
+
+        if prefix == self.k.default_prefix:
+            self.prefix_cache.pop(guild_id, None)
+        else:
+            self.prefix_cache[guild_id] = prefix
+
+    def _update_language_cache(self, guild_id: int, language: str) -> None:
+        if self.is_own_guild(guild_id):
+            self.language_cache[guild_id] = language
+
+    def _update_replies_cache(self, guild_id: int, do_replies: bool) -> None:
+        if not self.is_own_guild(guild_id):
+            return
+
+        if do_replies:
+            self.no_replies_cache.discard(guild_id)
+        else:
+            self.no_replies_cache.add(guild_id)
+
+    def _update_disabled_commands_cache(self, guild_id: int, commands: list[str]) -> None:
+        if not self.is_own_guild(guild_id):
+            return
+
+        if commands:
+            self.disabled_commands[guild_id] = set(commands)
+        else:
+            self.disabled_commands.pop(guild_id, None)
+
     @property
     def embed_color(self) -> discord.Color:
         return getattr(discord.Color, self.d.embed_color)()
@@ -270,6 +345,8 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
         return True
 
     async def before_command_invoked(self, ctx: CustomContext):
+        start_command(ctx.command.qualified_name)
+
         self.command_count += 1
 
         if ctx.command.cog_name == "Econ":
@@ -300,6 +377,17 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
         )
 
     async def after_command_invoked(self, ctx: CustomContext):
+        usage = current_usage()
+
+        if usage is not None:
+            self.command_usage_stats.record(usage)
+
+            # commands can declare a budget with extras={"query_budget": {"max_db_queries": n, ...}}
+            try:
+                usage.check_budget(**ctx.command.extras.get("query_budget", {}))
+            except QueryBudgetExceededError as e:
+                self.logger.warning(str(e))
+
         try:
             if ctx.command.qualified_name in self.d.concurrency_limited:
                 await self.karen.release_concurrency(ctx.command.qualified_name, ctx.author.id)
@@ -392,6 +480,10 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
             asyncio_tasks=len(asyncio.all_tasks()),
         )
 
+    @handle_packet(PacketType.FETCH_COMMAND_USAGE)
+    async def packet_fetch_command_usage(self):
+        return self.command_usage_stats.stats()
+
     @handle_packet(PacketType.FETCH_GUILD_COUNT)
     async def packet_fetch_guild_count(self):
         return len(self.guilds)
@@ -433,16 +525,9 @@ class VillagerBotCluster(commands.AutoShardedBot, PacketHandlerRegistry):
     async def packet_reload_cog(self, cog: str):
         await self.reload_extension(cog)
 
-    @handle_packet(PacketType.BOTBAN_CACHE_ADD)
-    async def packet_botban_cache_add(self, user_id: int):
-        self.botban_cache.add(user_id)
-
-    @handle_packet(PacketType.BOTBAN_CACHE_REMOVE)
-    async def packet_botban_cache_remove(self, user_id: int):
-        try:
-            self.botban_cache.remove(user_id)
-        except KeyError:
-            pass
+    @handle_packet(PacketType.CACHE_INVALIDATION)
+    async def packet_cache_invalidation(self, topic: int, key: int, value: Any, version: int):
+        self.cache_subscriptions.dispatch(CacheTopic(topic), key, value, version)
 
     @handle_packet(PacketType.LOOKUP_USER)
     async def packet_lookup_user(self, user_id: int):
@@ -42,8 +42,8 @@ class PacketType(IntEnum):
     GET_USER_NAME = auto()
     FETCH_GUILD_COUNT = auto()
     RELOAD_COG = auto()
-    BOTBAN_CACHE_ADD = auto()
-    BOTBAN_CACHE_REMOVE = auto()
+    BOTBAN_CACHE_ADD = auto()  # unused, kept so the values of the packets after it don't change
+    BOTBAN_CACHE_REMOVE = auto()  # unused, see above
     LOOKUP_USER = auto()
     PING = auto()
     FETCH_GUILD_IDS = auto()
@@ -52,3 +52,15 @@ class PacketType(IntEnum):
     FETCH_TOP_GUILDS_BY_ACTIVE_MEMBERS = auto()
     FETCH_TOP_GUILDS_BY_COMMANDS = auto()
     COMMAND_EXECUTION = auto()
+    DB_PREPARE = auto()
+    FETCH_QUERY_STATS = auto()
+    LEADERBOARD_UPDATE = auto()
+    LEADERBOARD_SYNC_USER = auto()
+    LEADERBOARD_FETCH = auto()
+    CACHE_INVALIDATE = auto()
+    CACHE_INVALIDATION = auto()
+    DB_CURSOR_OPEN = auto()
+    DB_CURSOR_FETCH = auto()
+    DB_CURSOR_CLOSE = auto()
+    REMINDER_ADD = auto()
+    FETCH_COMMAND_USAGE = auto()
@@ -93,15 +93,24 @@ class Server(ComsBase):
         await asyncio.wait(coros)
 
     async def broadcast(
-        self, packet_type: PacketType, packet_data: Optional[dict[str, T_PACKET_DATA]] = None
+        self,
+        packet_type: PacketType,
+        packet_data: Optional[dict[str, T_PACKET_DATA]] = None,
+        ws_ids: Optional[set[uuid.UUID]] = None,
     ) -> list[T_PACKET_DATA]:
-        if len(self._connections) == 0:
+        """Sends the packet to all connected clients (or only those in ws_ids) and returns their responses"""
+
+        if ws_ids is None:
+            ws_ids = {ws.id for ws in self._connections}
+        else:
+            ws_ids = ws_ids & {ws.id for ws in self._connections}
+
+        if len(ws_ids) == 0:
             raise NoConnectedClientsError()
 
         broadcast_id = self._get_packet_id("b")
         broadcast_packet = Packet(id=broadcast_id, type=packet_type, data=packet_data)
 
-        ws_ids = {ws.id for ws in self._connections}
         broadcast_coros = [
             self._send(c, broadcast_packet) for c in self._connections if c.id in ws_ids
         ]
@@ -0,0 +1,9 @@
+from enum import IntEnum
+
+
+class CacheTopic(IntEnum):
+    BOTBAN = 1  # key: user_id, value: whether the user is botbanned
+    GUILD_PREFIX = 2  # key: guild_id, value: prefix
+    GUILD_LANGUAGE = 3  # key: guild_id, value: language
+    GUILD_REPLIES = 4  # key: guild_id, value: whether replies are enabled
+    GUILD_DISABLED_COMMANDS = 5  # key: guild_id, value: list of disabled commands
@@ -1,8 +1,10 @@
+import random
 from typing import Any, Optional
 
-from pydantic import Field, HttpUrl
+from pydantic import Field, HttpUrl, PrivateAttr
 
 from common.models.base_model import BaseModel, ImmutableBaseModel
+from common.utils.loot_table import LootTable
 
 
 class MobsMech(ImmutableBaseModel):
@@ -23,6 +25,12 @@ class Findable(ImmutableBaseModel):
     sticky: bool
 
 
+def _chance_of_one(upper: int) -> float:
+    """The chance of random.randint(0, upper) == 1"""
+
+    return 1 / (upper + 1) if upper >= 1 else 0.0
+
+
 class Mining(ImmutableBaseModel):
     finds: list[list[str]]
     find_values: dict[str, float]
@@ -30,10 +38,65 @@ class Mining(ImmutableBaseModel):
     yields_pickaxes: dict[str, list[int]]  # emerald yield from different pickaxes
     findables: list[Findable]
 
+    # loot tables built once from the rolls the econ commands used to do for every draw
+    _findables_table: LootTable[Optional[Findable]] = PrivateAttr()
+    _findables_lucky_table: LootTable[Optional[Findable]] = PrivateAttr()
+    _present_table: LootTable[Findable] = PrivateAttr()
+    _barrel_table: LootTable[Optional[Findable]] = PrivateAttr()
+    _yield_chances: dict[str, float] = PrivateAttr()
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+
+        self._findables_table = LootTable.from_sequential_rolls(
+            self.findables, [_chance_of_one(f.rarity) for f in self.findables]
+        )
+        # randint(0, rarity) == 1 or randint(0, rarity) < 3
+        self._findables_lucky_table = LootTable.from_sequential_rolls(
+            self.findables,
+            [
+                1 - (1 - _chance_of_one(f.rarity)) * (1 - min(3, f.rarity + 1) / (f.rarity + 1))
+                for f in self.findables
+            ],
+        )
+        self._present_table = LootTable.from_sequential_rolls(
+            self.findables,
+            [_chance_of_one(f.rarity // 2 + 2) for f in self.findables],
+            until_found=True,
+        )
+
+        barrel_findables = [f for f in self.findables if f.rarity > 1000]
+        self._barrel_table = LootTable.from_sequential_rolls(
+            barrel_findables,
+            [_chance_of_one(int(f.rarity // 1.5) + 5) for f in barrel_findables],
+            rounds=20,
+        )
+
+        # yields_pickaxes is [chances of finding emeralds, chances of not finding them]
+        self._yield_chances = {p: y[0] / (y[0] + y[1]) for p, y in self.yields_pickaxes.items()}
+
     @property
     def pickaxes(self) -> list[str]:
         return list(self.yields_pickaxes)[::-1]
 
+    def draw_findable(self, lucky: bool) -> Optional[Findable]:
+        """Draws the item found when mining, if any"""
+
+        return (self._findables_lucky_table if lucky else self._findables_table).draw()
+
+    def draw_present(self) -> Findable:
+        return self._present_table.draw()
+
+    def draw_barrel(self) -> Optional[Findable]:
+        """Draws the item found in a barrel, if any (otherwise it has emeralds)"""
+
+        return self._barrel_table.draw()
+
+    def draw_yield(self, pickaxe: str) -> bool:
+        """Whether mining with the given pickaxe finds emeralds"""
+
+        return random.random() < self._yield_chances[pickaxe]
+
 
 class Fishing(ImmutableBaseModel):
     class Fish(BaseModel):
@@ -54,6 +117,27 @@ class Fishing(ImmutableBaseModel):
     def fishing_weights(self) -> list[float]:
         return [(len(self.fish_ids) - f.rarity) ** self.exponent for f in self.fish.values()]
 
+    _findables_table: LootTable[Findable] = PrivateAttr()
+    _fish_table: LootTable[str] = PrivateAttr()
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+
+        self._findables_table = LootTable.from_sequential_rolls(
+            self.findables,
+            [_chance_of_one(f.rarity // 2 + 2) for f in self.findables],
+            until_found=True,
+        )
+        self._fish_table = LootTable(self.fish_ids, self.fishing_weights)
+
+    def draw_findable(self) -> Findable:
+        return self._findables_table.draw()
+
+    def draw_fish(self) -> str:
+        """Draws the id of a fish"""
+
+        return self._fish_table.draw()
+
 
 class ShopItem(ImmutableBaseModel):
     class DbEntry(ImmutableBaseModel):
@@ -1,7 +1,10 @@
 import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
+
+MAX_HEALTH = 20
+HEALTH_REGEN_INTERVAL = datetime.timedelta(seconds=32)  # users regenerate 1 health every interval
 
 
 class User(BaseModel):
@@ -10,8 +13,25 @@ class User(BaseModel):
     emeralds: int = Field(default=0)
     vault_balance: int = Field(default=0)
     vault_max: int = Field(default=1)
-    health: int = Field(default=20)
+    health: int = Field(default=MAX_HEALTH)
+    health_at: Optional[datetime.datetime]  # when health was last set
     vote_streak: int = Field(default=0)
     last_vote: Optional[datetime.datetime]
     give_alert: bool = Field(default=True)
     shield_pearl: Optional[datetime.datetime]
+
+    @root_validator(skip_on_failure=True)
+    def apply_health_regen(cls, values: dict[str, Any]) -> dict[str, Any]:
+        # health isn't regenerated in the database, instead it's derived from health_at when loaded
+        health_at: Optional[datetime.datetime] = values["health_at"]
+
+        if health_at is not None and values["health"] < MAX_HEALTH:
+            if health_at.tzinfo is None:
+                health_at = health_at.replace(tzinfo=datetime.timezone.utc)
+
+            regen = (
+                datetime.datetime.now(datetime.timezone.utc) - health_at
+            ) // HEALTH_REGEN_INTERVAL
+            values["health"] = min(values["health"] + max(regen, 0), MAX_HEALTH)
+
+        return values
@@ -0,0 +1,178 @@
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar, cast
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_caches = weakref.WeakSet["LRUCache"]()
+
+
+def get_caches() -> list["LRUCache"]:
+    """Returns all live named caches, sorted by name"""
+
+    return sorted((c for c in _caches if c.name is not None), key=(lambda c: c.name or ""))
+
+
+class LRUCache(Generic[K, V]):
+    """Size-bounded mapping which evicts the least recently used entry when full
+
+    If a ttl (in seconds) is passed, entries also expire that long after they were last set. Expired
+    entries are dropped lazily when accessed or by calling clear_expired(). All operations except
+    clear_expired() are O(1).
+
+    on_evict(key, value) is called whenever an entry is dropped because it expired or the cache was
+    full, but not when it's removed explicitly."""
+
+    __slots__ = (
+        "name",
+        "maxsize",
+        "ttl",
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "on_evict",
+        "_data",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        *,
+        name: Optional[str] = None,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.on_evict = on_evict
+
+        self._data = OrderedDict[K, tuple[V, float]]()  # key: (value, expires_at)
+
+        if name is not None:
+            _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: K) -> None:
+        del self._data[key]
+
+    def _lookup(self, key: K) -> Optional[tuple[V, float]]:
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry[1] < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+
+            if self.on_evict is not None:
+                self.on_evict(key, entry[0])
+
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._lookup(key)
+
+        if entry is None:
+            return default
+
+        return entry[0]
+
+    def set(self, key: K, value: V) -> None:
+        expires_at = float("inf") if self.ttl is None else (time.monotonic() + self.ttl)
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        if len(self._data) > self.maxsize:
+            evicted_key, (evicted, _) = self._data.popitem(last=False)
+            self.evictions += 1
+
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted)
+
+    def add(self, key: K) -> None:
+        """Allows the cache to be used like a set, only meant for an LRUCache[K, None]"""
+
+        self.set(key, cast(V, None))
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.pop(key, None)
+
+        if entry is None:
+            return default
+
+        return entry[0]
+
+    def discard(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def clear_expired(self) -> list[tuple[K, V]]:
+        """Removes all expired entries and returns them"""
+
+        if self.ttl is None:
+            return []
+
+        now = time.monotonic()
+        expired = [(k, v) for k, (v, expires_at) in self._data.items() if expires_at < now]
+
+        for k, _ in expired:
+            del self._data[k]
+
+        self.expirations += len(expired)
+
+        if self.on_evict is not None:
+            for k, v in expired:
+                self.on_evict(k, v)
+
+        return expired
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
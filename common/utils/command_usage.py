@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+
+class QueryBudgetExceededError(Exception):
+    def __init__(
+        self, usage: "CommandUsage", max_karen_packets: Optional[int], max_db_queries: Optional[int]
+    ):
+        super().__init__(
+            f"Command {usage.command} used {usage.karen_packets} Karen packets (max {max_karen_packets}) "
+            f"and {usage.db_queries} database queries (max {max_db_queries})"
+        )
+        self.usage = usage
+
+
+class CommandUsage:
+    """Karen packets and database queries made during one invocation of a command"""
+
+    __slots__ = ("command", "karen_packets", "db_queries", "karen_time")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.karen_packets = 0
+        self.db_queries = 0
+        self.karen_time = 0.0  # seconds spent waiting on Karen
+
+    def check_budget(
+        self, *, max_karen_packets: Optional[int] = None, max_db_queries: Optional[int] = None
+    ) -> None:
+        if (max_karen_packets is not None and self.karen_packets > max_karen_packets) or (
+            max_db_queries is not None and self.db_queries > max_db_queries
+        ):
+            raise QueryBudgetExceededError(self, max_karen_packets, max_db_queries)
+
+
+_current_usage = ContextVar[Optional[CommandUsage]]("current_usage", default=None)
+
+
+def current_usage() -> Optional[CommandUsage]:
+    return _current_usage.get()
+
+
+def start_command(command: str) -> CommandUsage:
+    """Attributes Karen packets and queries made from the current context (and tasks created from it)
+    to a new invocation of the command"""
+
+    usage = CommandUsage(command)
+    _current_usage.set(usage)
+
+    return usage
+
+
+@contextmanager
+def track_command(command: str) -> Iterator[CommandUsage]:
+    """Like start_command, but only for the duration of the with block"""
+
+    usage = CommandUsage(command)
+    token = _current_usage.set(usage)
+
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_karen_packet(elapsed: float) -> None:
+    if (usage := _current_usage.get()) is not None:
+        usage.karen_packets += 1
+        usage.karen_time += elapsed
+
+
+def record_db_query() -> None:
+    if (usage := _current_usage.get()) is not None:
+        usage.db_queries += 1
+
+
+class CommandUsageStats:
+    """Aggregates the usage of every invocation per command"""
+
+    def __init__(self):
+        self._stats = dict[str, dict[str, Any]]()  # command: stats
+
+    def record(self, usage: CommandUsage) -> None:
+        stats = self._stats.get(usage.command)
+
+        if stats is None:
+            stats = self._stats[usage.command] = {
+                "command": usage.command,
+                "calls": 0,
+                "karen_packets": 0,
+                "db_queries": 0,
+                "karen_time": 0.0,
+                "max_karen_packets": 0,
+                "max_db_queries": 0,
+            }
+
+        stats["calls"] += 1
+        stats["karen_packets"] += usage.karen_packets
+        stats["db_queries"] += usage.db_queries
+        stats["karen_time"] += usage.karen_time
+        stats["max_karen_packets"] = max(stats["max_karen_packets"], usage.karen_packets)
+        stats["max_db_queries"] = max(stats["max_db_queries"], usage.db_queries)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [dict(s) for s in self._stats.values()]
@@ -0,0 +1,48 @@
+LEADERBOARDS = {  # leaderboard / column: table it's stored in
+    "emeralds": "users",
+    "pillaged_emeralds": "leaderboards",
+    "mobs_killed": "leaderboards",
+    "fish_fished": "leaderboards",
+    "commands": "leaderboards",
+    "crops_planted": "leaderboards",
+    "trash_emptied": "leaderboards",
+    "week_emeralds": "leaderboards",
+    "week_commands": "leaderboards",
+}
+
+# only count for the week in leaderboards.week, they're reset lazily when a row from a previous week
+# is written to instead of every row being reset when a new week starts
+WEEKLY_LEADERBOARDS = ("week_emeralds", "week_commands")
+
+# the start of the current week in UTC, regardless of the session's timezone, nothing else should
+# decide what week it is so that the week stamps and the checks against them always agree
+CURRENT_WEEK = "(DATE_TRUNC('WEEK', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC')"
+
+
+def current_value(lb: str) -> str:
+    """SQL expression for the current value of a column in the leaderboards table"""
+
+    if lb in WEEKLY_LEADERBOARDS:
+        return f"(CASE WHEN leaderboards.week = {CURRENT_WEEK} THEN leaderboards.{lb} ELSE 0 END)"
+
+    return f"leaderboards.{lb}"
+
+
+def leaderboards_set_clause(updates: dict[str, str]) -> str:
+    """Builds the SET clause for updating the leaderboards table
+
+    updates maps columns to SQL expressions, in which {current} is replaced by the column's current
+    value. If any weekly leaderboard is updated, the other weekly leaderboards are reset if needed
+    and the row is stamped with the current week."""
+
+    if any(lb in updates for lb in WEEKLY_LEADERBOARDS):
+        updates = {lb: "{current}" for lb in WEEKLY_LEADERBOARDS} | updates
+
+    assignments = [
+        f"{lb} = {expr.format(current=current_value(lb))}" for lb, expr in updates.items()
+    ]
+
+    if any(lb in updates for lb in WEEKLY_LEADERBOARDS):
+        assignments.append(f"week = {CURRENT_WEEK}")
+
+    return ", ".join(assignments)
@@ -0,0 +1,106 @@
+import random
+from typing import Any, Generic, Literal, Optional, Sequence, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class LootTable(Generic[T]):
+    """Weighted random choice between outcomes in O(1) per draw, using Vose's alias method"""
+
+    __slots__ = ("outcomes", "probabilities", "_prob", "_alias")
+
+    def __init__(self, outcomes: Sequence[T], weights: Sequence[float]):
+        if len(outcomes) != len(weights) or not outcomes:
+            raise ValueError("outcomes and weights must be non-empty and of the same length")
+
+        total = sum(weights)
+
+        if total <= 0 or any(w < 0 for w in weights):
+            raise ValueError("weights must be non-negative and sum to more than 0")
+
+        n = len(outcomes)
+
+        self.outcomes = list(outcomes)
+        self.probabilities = [w / total for w in weights]
+
+        self._prob = [0.0] * n
+        self._alias = list(range(n))
+
+        scaled = [p * n for p in self.probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+
+        while small and large:
+            s, l = small.pop(), large.pop()
+
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+
+        # what's left is 1 give or take floating point error
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    @overload
+    @classmethod
+    def from_sequential_rolls(
+        cls, outcomes: Sequence[T], chances: Sequence[float], *, until_found: Literal[True]
+    ) -> "LootTable[T]":
+        ...
+
+    @overload
+    @classmethod
+    def from_sequential_rolls(
+        cls,
+        outcomes: Sequence[T],
+        chances: Sequence[float],
+        *,
+        rounds: int = 1,
+        until_found: Literal[False] = False,
+        nothing: Optional[T] = None,
+    ) -> "LootTable[Optional[T]]":
+        ...
+
+    @classmethod
+    def from_sequential_rolls(
+        cls,
+        outcomes: Sequence[Any],
+        chances: Sequence[float],
+        *,
+        rounds: int = 1,
+        until_found: bool = False,
+        nothing: Any = None,
+    ) -> "LootTable[Any]":
+        """Builds the table equivalent to rolling for each outcome in order (with the given chances) and
+        taking the first success, repeated for the given amount of rounds or until something is found
+
+        If nothing is found after all rounds, the nothing outcome is drawn."""
+
+        firsts = []  # chance of each outcome being the first success in a round
+        none_found = 1.0  # chance of a round not finding anything
+
+        for chance in chances:
+            firsts.append(none_found * chance)
+            none_found *= 1 - chance
+
+        if until_found:
+            return cls(outcomes, firsts)
+
+        # chance of reaching any given round, summed over all rounds
+        rounds_reached = (
+            rounds if none_found == 1 else (1 - none_found**rounds) / (1 - none_found)
+        )
+
+        return cls(
+            [*outcomes, nothing], [f * rounds_reached for f in firsts] + [none_found**rounds]
+        )
+
+    def draw(self) -> T:
+        i = random.randrange(len(self._prob))
+
+        if random.random() < self._prob[i]:
+            return self.outcomes[i]
+
+        return self.outcomes[self._alias[i]]
@@ -9,6 +9,7 @@ from collections import defaultdict
 from typing import Any, Optional
 
 import aiohttp
+import arrow
 import asyncpg
 import psutil
 
@@ -21,12 +22,21 @@ from common.models.data import Data
 from common.models.system_stats import SystemStats
 from common.models.topgg_vote import TopggVote
 from common.utils.code import execute_code
-from common.utils.misc import chunk_sequence
+from common.utils.leaderboard_sql import (
+    CURRENT_WEEK,
+    LEADERBOARDS,
+    WEEKLY_LEADERBOARDS,
+    leaderboards_set_clause,
+)
 from common.utils.recurring_tasks import RecurringTasksMixin, recurring_task
 from common.utils.setup import setup_logging
 
 from karen.models.secrets import Secrets
 from karen.utils.cooldowns import CooldownManager, MaxConcurrencyManager
+from karen.utils.db_cursors import DbCursorManager
+from karen.utils.leaderboards import LeaderboardIndex
+from karen.utils.query_registry import QueryRegistry
+from karen.utils.reminders import ReminderScheduler
 from karen.utils.setup import setup_database_pool
 from karen.utils.shard_ids import ShardIdManager
 from karen.utils.topgg import VotingWebhookServer
@@ -48,6 +58,10 @@ class Share:
             dict[str, float]
         )  # user_id: dict[fx: expires_at]
         self.current_cluster_id = 0
+        self.leaderboards = dict[str, LeaderboardIndex]()  # leaderboard: index
+        # the week which the weekly leaderboards in self.leaderboards are for
+        self.leaderboards_week: Optional[datetime.datetime] = None
+        self.cache_version = 0  # last version assigned to a cache invalidation
 
         self.command_executions = list[tuple[int, Optional[int], str, bool, datetime.datetime]]()
 
@@ -82,6 +96,12 @@ class MechaKaren(PacketHandlerRegistry, RecurringTasksMixin):
 
         self.shard_ids = ShardIdManager(self.k.shard_count, self.k.cluster_count)
 
+        self.queries = QueryRegistry()
+        self.cursors = DbCursorManager(max(1, self.k.database.pool_size // 4))
+        self.reminders = ReminderScheduler(
+            self._deliver_reminders, horizon=600, logger=self.logger.getChild("reminders")
+        )
+
         self._did_initial_load = False
         self._did_stop = False
 
@@ -108,6 +128,8 @@ class MechaKaren(PacketHandlerRegistry, RecurringTasksMixin):
             self.k.database.port,
         )
 
+        await self._load_leaderboards()
+
         self.aiohttp = aiohttp.ClientSession()
         self.logger.info("Initialized aiohttp ClientSession")
 
@@ -123,6 +145,7 @@ class MechaKaren(PacketHandlerRegistry, RecurringTasksMixin):
         self.logger.info("Stopped websocket server")
 
         self.cancel_recurring_tasks()
+        self.reminders.stop()
 
         if self._db is not None:
             await self.db.close()
@@ -157,23 +180,28 @@ class MechaKaren(PacketHandlerRegistry, RecurringTasksMixin):
 
     async def _disconnect_callback(self, ws_id: uuid.UUID) -> None:
         self.shard_ids.release(ws_id)
+        await self.cursors.close_for(ws_id)
 
     def _on_ready(self) -> None:
         self.ready_event.set()
         self.start_recurring_tasks()
+        self.reminders.start()
 
     async def _update_guild_diffs(self):
         self.logger.info("Updating guild events table with missed joins and leaves...")
 
-        current_guilds_db = await self.db.fetch(
-            """SELECT COALESCE(js.guild_id, ls.guild_id) AS guild_id FROM (
+        current_guilds_db = set[int]()
+
+        async with self.db.acquire() as con, con.transaction(readonly=True):
+            async for r in con.cursor(
+                """SELECT COALESCE(js.guild_id, ls.guild_id) AS guild_id FROM (
     SELECT guild_id, COUNT(*) AS c FROM guild_events WHERE event_type = 1 GROUP BY guild_id) js
 FULL JOIN (
     SELECT guild_id, COUNT(*) AS c FROM guild_events WHERE event_type = 2 GROUP BY guild_id) ls
-ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0"""
-        )
-
-        current_guilds_db: set[int] = {r["guild_id"] for r in current_guilds_db}
+ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""",
+                prefetch=5000,
+            ):
+                current_guilds_db.add(r["guild_id"])
 
         current_guilds = set[int](
             itertools.chain.from_iterable(await self.server.broadcast(PacketType.FETCH_GUILD_IDS))
@@ -193,6 +221,82 @@ ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""
 
         self.logger.info("Done updating guild events table")
 
+    async def _load_leaderboards(self, lbs: Optional[set[str]] = None) -> None:
+        start = time.perf_counter()
+
+        if lbs is None or not lbs.isdisjoint(WEEKLY_LEADERBOARDS):
+            self.v.leaderboards_week = await self.db.fetchval(f"SELECT {CURRENT_WEEK}")
+
+        for lb, table in LEADERBOARDS.items():
+            if lbs is not None and lb not in lbs:
+                continue
+
+            query = f"SELECT user_id, {lb} FROM {table} WHERE {lb} > 0"
+
+            if table == "users":
+                query += " AND bot_banned = false"
+
+            if lb in WEEKLY_LEADERBOARDS:
+                query += f" AND week = {CURRENT_WEEK}"
+
+            async with self.db.acquire() as con, con.transaction(readonly=True):
+                entries = [(r[0], r[1]) async for r in con.cursor(query, prefetch=5000)]
+
+            self.v.leaderboards[lb] = LeaderboardIndex(entries)
+
+        self.logger.info("Loaded leaderboards in %.2f seconds", time.perf_counter() - start)
+
+    def _get_leaderboard(self, lb: str) -> LeaderboardIndex:
+        try:
+            return self.v.leaderboards[lb]
+        except KeyError:
+            raise ValueError(f"Unknown leaderboard: {lb}")
+
+    async def _deliver_reminders(self, reminders: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # reminders are only sent if they're still in the db, so ones which were deleted in the
+        # meantime aren't sent, they're only deleted once they've been delivered so none are lost
+        records = await self.db.fetch(
+            "SELECT id, guild_id, channel_id, user_id, message_id, reminder FROM reminders WHERE id = ANY($1::BIGINT[])",
+            [r["id"] for r in reminders],
+        )
+
+        async def deliver(record: asyncpg.Record) -> bool:
+            ws_ids = None
+
+            # route the reminder to the cluster which has the guild, if it's connected
+            if record["guild_id"] is not None:
+                ws_id = self.shard_ids.get_ws_id((record["guild_id"] >> 22) % self.k.shard_count)
+
+                if ws_id is not None:
+                    ws_ids = {ws_id}
+
+            try:
+                await self.server.broadcast(
+                    PacketType.REMINDER,
+                    {
+                        "channel_id": record["channel_id"],
+                        "user_id": record["user_id"],
+                        "message_id": record["message_id"],
+                        "reminder": record["reminder"],
+                    },
+                    ws_ids,
+                )
+            except Exception:
+                self.logger.error("Failed to deliver reminder %s", record["id"], exc_info=True)
+                return False
+
+            return True
+
+        results = await asyncio.gather(*[deliver(r) for r in records])
+        delivered = {r["id"] for r, ok in zip(records, results) if ok}
+
+        await self.db.execute("DELETE FROM reminders WHERE id = ANY($1::BIGINT[])", list(delivered))
+
+        # reminders which are no longer in the db don't need to be retried
+        undelivered = {r["id"] for r in records} - delivered
+
+        return [r for r in reminders if r["id"] in undelivered]
+
     @classmethod
     def _transform_query_result(cls, result: Any) -> Any:
         if isinstance(result, list):
@@ -209,6 +313,13 @@ ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""
     async def loop_clear_dead(self):
         self.v.command_cooldowns.clear_dead()
 
+    @recurring_task(minutes=1)
+    async def loop_close_idle_cursors(self):
+        closed = await self.cursors.close_idle(max_idle=300)
+
+        if closed:
+            self.logger.warning("Closed %s idle database cursor(s)", closed)
+
     @recurring_task(minutes=1)
     async def loop_dump_command_counts(self):
         if not self.v.command_counts_lb:
@@ -224,10 +335,17 @@ ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""
         )
 
         await self.db.executemany(
-            'INSERT INTO leaderboards (user_id, commands, week_commands) VALUES ($1, $2, $2) ON CONFLICT ("user_id") DO UPDATE SET "commands" = leaderboards.commands + $2, "week_commands" = leaderboards.week_commands + $2 WHERE leaderboards.user_id = $1',
+            "INSERT INTO leaderboards (user_id, commands, week_commands) VALUES ($1, $2, $2) ON CONFLICT (user_id) DO UPDATE SET "
+            + leaderboards_set_clause(
+                {"commands": "{current} + $2", "week_commands": "{current} + $2"}
+            ),
             commands_dump,
         )
 
+        for user_id, commands in commands_dump:
+            self.v.leaderboards["commands"].add(user_id, commands)
+            self.v.leaderboards["week_commands"].add(user_id, commands)
+
     @recurring_task(minutes=1)
     async def loop_dump_commands(self):
         if not self.v.command_executions:
@@ -236,35 +354,71 @@ ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""
         commands_dump = self.v.command_executions
         self.v.command_executions = []
 
-        await self.db.executemany(
-            "INSERT INTO command_executions (user_id, guild_id, command, is_slash, at) VALUES ($1, $2, $3, $4, $5)",
-            commands_dump,
-        )
-
-    @recurring_task(seconds=32)
-    async def loop_heal_users(self):
-        await self.db.execute("UPDATE users SET health = health + 1 WHERE health < 20")
+        # (hour, guild_id, user_id): count, guild_id is 0 for commands ran in dms
+        hourly_counts = defaultdict[tuple[datetime.datetime, int, int], int](int)
+        for user_id, guild_id, _, _, at in commands_dump:
+            hour = at.replace(minute=0, second=0, microsecond=0)
+            hourly_counts[(hour, guild_id or 0, user_id)] += 1
+
+        hours, guild_ids, user_ids = zip(*hourly_counts.keys())
+
+        async with self.db.acquire() as con, con.transaction():
+            await con.copy_records_to_table(
+                "command_executions",
+                records=commands_dump,
+                columns=("user_id", "guild_id", "command", "is_slash", "at"),
+            )
+
+            await con.execute(
+                "INSERT INTO command_executions_hourly (hour, guild_id, user_id, count) "
+                "SELECT * FROM UNNEST($1::TIMESTAMPTZ[], $2::BIGINT[], $3::BIGINT[], $4::INT[]) "
+                "ON CONFLICT (hour, guild_id, user_id) DO UPDATE SET count = command_executions_hourly.count + EXCLUDED.count",
+                list(hours),
+                list(guild_ids),
+                list(user_ids),
+                list(hourly_counts.values()),
+            )
+
+    @recurring_task(hours=12, sleep_first=False)
+    async def loop_create_command_executions_partitions(self):
+        # the current month's partition and next month's are created ahead of time, anything which
+        # doesn't fit in a partition ends up in command_executions_default
+        month = arrow.utcnow().floor("month")
+
+        for start in (month, month.shift(months=1)):
+            end = start.shift(months=1)
+
+            await self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS command_executions_{start.format('YYYY_MM')} PARTITION OF command_executions "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
 
     @recurring_task(minutes=10)
     async def loop_clear_trivia_commands(self):
         self.v.trivia_commands.clear()
 
-    @recurring_task(seconds=5, sleep_first=False)
-    async def loop_remind_reminders(self):
+    @recurring_task(minutes=5, sleep_first=False)
+    async def loop_schedule_reminders(self):
+        # reminders which are added while Karen is running are pushed to the scheduler directly, this
+        # picks up the ones which were outside the scheduler's horizon
         reminders = await self.db.fetch(
-            "DELETE FROM reminders WHERE at <= NOW() RETURNING channel_id, user_id, message_id, reminder"
+            "SELECT id, at FROM reminders WHERE at <= NOW() + $1::INTERVAL",
+            datetime.timedelta(seconds=self.reminders.horizon),
         )
 
-        broadcast_coros = [self.server.broadcast(PacketType.REMINDER, {**r}) for r in reminders]
+        for r in reminders:
+            self.reminders.push({**r})
+
+    @recurring_task(minutes=1)
+    async def loop_reset_weekly_leaderboards(self):
+        # rows in the db are reset lazily, the in-memory leaderboards just have to be emptied
+        week = await self.db.fetchval(f"SELECT {CURRENT_WEEK}")
 
-        for coros_chunk in chunk_sequence(broadcast_coros, 4):
-            await asyncio.wait(coros_chunk)
+        if week != self.v.leaderboards_week:
+            self.v.leaderboards_week = week
 
-    @recurring_task(minutes=30, sleep_first=False)
-    async def loop_clear_weekly_leaderboards(self):
-        await self.db.execute(
-            "UPDATE leaderboards SET week_emeralds = 0, week_commands = 0, week = DATE_TRUNC('WEEK', NOW()) WHERE DATE_TRUNC('WEEK', NOW()) > week"
-        )
+            for lb in WEEKLY_LEADERBOARDS:
+                self.v.leaderboards[lb] = LeaderboardIndex()
 
     @recurring_task(hours=1, sleep_first=True)
     async def loop_topgg_stats(self):
@@ -416,25 +570,157 @@ ON js.guild_id = ls.guild_id WHERE (COALESCE(js.c, 0) - COALESCE(ls.c, 0)) > 0""
     async def packet_active_fx_clear(self, user_id: int):
         self.v.active_fx.pop(user_id, None)
 
+    @handle_packet(PacketType.DB_PREPARE)
+    async def packet_db_prepare(self, query: str):
+        return self.queries.register(query)
+
     @handle_packet(PacketType.DB_EXEC)
-    async def packet_db_exec(self, query: str, args: list[Any]):
-        await self.db.execute(query, *args)
+    async def packet_db_exec(self, query_id: int, args: list[Any]):
+        with self.queries.timed(query_id) as query:
+            await self.db.execute(query, *args)
 
     @handle_packet(PacketType.DB_EXEC_MANY)
-    async def packet_db_exec_many(self, query: str, args: list[list[Any]]):
-        await self.db.executemany(query, args)
+    async def packet_db_exec_many(self, query_id: int, args: list[list[Any]]):
+        with self.queries.timed(query_id) as query:
+            await self.db.executemany(query, args)
 
     @handle_packet(PacketType.DB_FETCH_VAL)
-    async def packet_db_fetch_one(self, query: str, args: list[Any]):
-        return self._transform_query_result(await self.db.fetchval(query, *args))
+    async def packet_db_fetch_one(self, query_id: int, args: list[Any]):
+        with self.queries.timed(query_id) as query:
+            return self._transform_query_result(await self.db.fetchval(query, *args))
 
     @handle_packet(PacketType.DB_FETCH_ROW)
-    async def packet_db_fetch_row(self, query: str, args: list[Any]):
-        return self._transform_query_result(await self.db.fetchrow(query, *args))
+    async def packet_db_fetch_row(self, query_id: int, args: list[Any]):
+        with self.queries.timed(query_id) as query:
+            return self._transform_query_result(await self.db.fetchrow(query, *args))
 
     @handle_packet(PacketType.DB_FETCH_ALL)
-    async def packet_db_fetch_all(self, query: str, args: list[Any]):
-        return self._transform_query_result(await self.db.fetch(query, *args))
+    async def packet_db_fetch_all(self, query_id: int, args: list[Any]):
+        with self.queries.timed(query_id) as query:
+            return self._transform_query_result(await self.db.fetch(query, *args))
+
+    @handle_packet(PacketType.DB_CURSOR_OPEN)
+    async def packet_db_cursor_open(self, query_id: int, args: list[Any], ws_id: uuid.UUID):
+        with self.queries.timed(query_id) as query:
+            return await self.cursors.open(self.db, ws_id, query, args)
+
+    @handle_packet(PacketType.DB_CURSOR_FETCH)
+    async def packet_db_cursor_fetch(self, cursor_id: int, n: int):
+        return self._transform_query_result(await self.cursors.fetch(cursor_id, n))
+
+    @handle_packet(PacketType.DB_CURSOR_CLOSE)
+    async def packet_db_cursor_close(self, cursor_id: int):
+        await self.cursors.close(cursor_id)
+
+    @handle_packet(PacketType.FETCH_QUERY_STATS)
+    async def packet_fetch_query_stats(self, limit: int):
+        return self.queries.get_stats(limit)
+
+    @handle_packet(PacketType.LEADERBOARD_UPDATE)
+    async def packet_leaderboard_update(self, user_id: int, lb: str, value: int, mode: str):
+        leaderboard = self._get_leaderboard(lb)
+        table = LEADERBOARDS[lb]
+
+        try:
+            # (value when the user has no leaderboards row yet, new value)
+            insert_expr, update_expr = {
+                "add": ("$2", "{current} + $2"),
+                "sub": ("-$2", "{current} - $2"),
+                "set": ("$2", "$2"),
+            }[mode]
+        except KeyError:
+            raise ValueError(f"Invalid leaderboard update mode: {mode}")
+
+        if table == "users":
+            record = await self.db.fetchrow(
+                f"UPDATE users SET {lb} = {update_expr.format(current=f'users.{lb}')} WHERE user_id = $1 RETURNING {lb}, bot_banned",
+                user_id,
+                value,
+            )
+
+            if record is None:
+                return 0
+
+            amount, bot_banned = record[lb], record["bot_banned"]
+        else:
+            amount = await self.db.fetchval(
+                f"INSERT INTO leaderboards (user_id, {lb}) VALUES ($1, {insert_expr}) ON CONFLICT (user_id) DO UPDATE SET "
+                + leaderboards_set_clause({lb: update_expr})
+                + f" RETURNING {lb}",
+                user_id,
+                value,
+            )
+            bot_banned = False
+
+        leaderboard.set(user_id, 0 if bot_banned else amount)
+
+        return amount
+
+    @handle_packet(PacketType.LEADERBOARD_SYNC_USER)
+    async def packet_leaderboard_sync_user(self, user_id: int):
+        user = await self.db.fetchrow(
+            f"SELECT *, (week = {CURRENT_WEEK}) AS current_week FROM users LEFT JOIN leaderboards USING (user_id) WHERE user_id = $1",
+            user_id,
+        )
+
+        for lb, leaderboard in self.v.leaderboards.items():
+            if (
+                user is None
+                or (LEADERBOARDS[lb] == "users" and user["bot_banned"])
+                or (lb in WEEKLY_LEADERBOARDS and not user["current_week"])
+            ):
+                leaderboard.discard(user_id)
+            else:
+                leaderboard.set(user_id, user[lb] or 0)
+
+    @handle_packet(PacketType.LEADERBOARD_FETCH)
+    async def packet_leaderboard_fetch(self, lb: str, user_id: int, limit: int):
+        leaderboard = self._get_leaderboard(lb)
+
+        rows = [
+            {"user_id": entry_user_id, "amount": amount, "idx": idx}
+            for idx, (entry_user_id, amount) in enumerate(leaderboard.top(limit), start=1)
+        ]
+
+        user_rank = leaderboard.rank(user_id)
+
+        if user_rank is not None and user_rank > limit:
+            rows.append({"user_id": user_id, "amount": leaderboard.get(user_id), "idx": user_rank})
+
+        return rows
+
+    @handle_packet(PacketType.CACHE_INVALIDATE)
+    async def packet_cache_invalidate(self, topic: int, key: int, value: Any):
+        # versions are based off the current time so they keep increasing across restarts
+        self.v.cache_version = max(self.v.cache_version + 1, time.time_ns())
+
+        await self.server.broadcast(
+            PacketType.CACHE_INVALIDATION,
+            {"topic": topic, "key": key, "value": value, "version": self.v.cache_version},
+        )
+
+    @handle_packet(PacketType.REMINDER_ADD)
+    async def packet_reminder_add(
+        self,
+        user_id: int,
+        guild_id: Optional[int],
+        channel_id: int,
+        message_id: int,
+        reminder: str,
+        at: datetime.datetime,
+    ):
+        record = await self.db.fetchrow(
+            "INSERT INTO reminders (user_id, guild_id, channel_id, message_id, reminder, at) VALUES ($1, $2, $3, $4, $5, $6) RETURNING id, at",
+            user_id,
+            guild_id,
+            channel_id,
+            message_id,
+            reminder,
+            at,
+        )
+        assert record is not None  # INSERT ... RETURNING always returns the inserted row
+
+        self.reminders.push({**record})
 
     @handle_packet(PacketType.TRIVIA)
     async def packet_trivia(self, user_id: int):
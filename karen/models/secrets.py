@@ -19,6 +19,7 @@ class DatabaseSecrets(ImmutableBaseModel):
     user: str
     auth: str
     pool_size: int = Field(ge=1)
+    statement_cache_size: int = Field(default=512, ge=0)  # per connection, see QueryRegistry
 
 
 class Secrets(ImmutableBaseModel):
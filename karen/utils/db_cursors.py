@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Any
+
+import asyncpg
+from asyncpg.pool import PoolConnectionProxy
+
+
+class UnknownCursorError(Exception):
+    """Raised when a cursor id is used which doesn't exist (i.e. it was closed for being idle)"""
+
+    def __init__(self, cursor_id: int):
+        super().__init__(f"Unknown cursor id: {cursor_id}")
+        self.cursor_id = cursor_id
+
+
+class DbCursor:
+    __slots__ = ("ws_id", "pool", "connection", "transaction", "cursor", "last_used")
+
+    def __init__(
+        self,
+        ws_id: uuid.UUID,
+        pool: asyncpg.Pool,
+        connection: PoolConnectionProxy,
+        transaction: Any,
+        cursor: Any,
+    ):
+        self.ws_id = ws_id
+        self.pool = pool
+        self.connection = connection
+        self.transaction = transaction
+        self.cursor = cursor
+        self.last_used = time.monotonic()
+
+
+class DbCursorManager:
+    """Keeps track of server-side cursors opened by the clusters
+
+    Each open cursor holds a pool connection and a transaction until it's exhausted or closed, so the
+    amount of cursors open at once is limited to keep the rest of the pool available."""
+
+    def __init__(self, max_open: int):
+        self._cursors = dict[int, DbCursor]()  # cursor_id: cursor
+        self._ids = itertools.count(1)
+        self._semaphore = asyncio.Semaphore(max_open)
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+    async def open(self, pool: asyncpg.Pool, ws_id: uuid.UUID, query: str, args: list[Any]) -> int:
+        await self._semaphore.acquire()
+
+        try:
+            connection: PoolConnectionProxy = await pool.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        try:
+            transaction = connection.transaction(readonly=True)
+            await transaction.start()
+
+            cursor = await connection.cursor(query, *args)
+        except BaseException:
+            await pool.release(connection)  # releasing also rolls back the transaction
+            self._semaphore.release()
+            raise
+
+        cursor_id = next(self._ids)
+        self._cursors[cursor_id] = DbCursor(ws_id, pool, connection, transaction, cursor)
+
+        return cursor_id
+
+    async def fetch(self, cursor_id: int, n: int) -> list[asyncpg.Record]:
+        """Fetches the next n rows, the cursor is closed automatically once it's exhausted"""
+
+        try:
+            db_cursor = self._cursors[cursor_id]
+        except KeyError:
+            raise UnknownCursorError(cursor_id)
+
+        db_cursor.last_used = time.monotonic()
+
+        try:
+            records = await db_cursor.cursor.fetch(n)
+        except BaseException:
+            await self.close(cursor_id)
+            raise
+
+        if len(records) < n:
+            await self.close(cursor_id)
+
+        return records
+
+    async def close(self, cursor_id: int) -> None:
+        db_cursor = self._cursors.pop(cursor_id, None)
+
+        if db_cursor is None:
+            return
+
+        try:
+            await db_cursor.transaction.rollback()
+        finally:
+            await db_cursor.pool.release(db_cursor.connection)
+            self._semaphore.release()
+
+    async def close_for(self, ws_id: uuid.UUID) -> None:
+        """Closes all cursors opened by the given websocket connection"""
+
+        for cursor_id in [c_id for c_id, c in self._cursors.items() if c.ws_id == ws_id]:
+            await self.close(cursor_id)
+
+    async def close_idle(self, max_idle: float) -> int:
+        """Closes cursors which haven't been fetched from in max_idle seconds"""
+
+        cutoff = time.monotonic() - max_idle
+        idle = [cursor_id for cursor_id, c in self._cursors.items() if c.last_used < cutoff]
+
+        for cursor_id in idle:
+            await self.close(cursor_id)
+
+        return len(idle)
@@ -0,0 +1,163 @@
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator, Optional
+
+_USER_ID_BITS = 64
+_USER_ID_MASK = (1 << _USER_ID_BITS) - 1
+
+
+def _make_key(user_id: int, amount: int) -> int:
+    # sorting by this key sorts by amount descending and then by user id ascending
+    return (-amount << _USER_ID_BITS) | user_id
+
+
+def _split_key(key: int) -> tuple[int, int]:
+    return key & _USER_ID_MASK, -(key >> _USER_ID_BITS)
+
+
+class _FenwickTree:
+    """Prefix sums over the bucket sizes of a LeaderboardIndex"""
+
+    __slots__ = ("_tree",)
+
+    def __init__(self, values: list[int]):
+        tree = [0, *values]
+
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+
+            if parent < len(tree):
+                tree[parent] += tree[i]
+
+        self._tree = tree
+
+    def add(self, idx: int, delta: int) -> None:
+        idx += 1
+
+        while idx < len(self._tree):
+            self._tree[idx] += delta
+            idx += idx & -idx
+
+    def prefix_sum(self, idx: int) -> int:
+        """Sum of the values before idx"""
+
+        total = 0
+
+        while idx > 0:
+            total += self._tree[idx]
+            idx -= idx & -idx
+
+        return total
+
+
+class LeaderboardIndex:
+    """In-memory sorted index of a leaderboard, only users with a positive amount are stored
+
+    Entries are kept in sorted buckets (similar to a sorted list / B-tree leaf level) with a Fenwick
+    tree over the bucket sizes, so updates and rank lookups are O(log n + bucket_size) and fetching
+    the top n entries is O(n)."""
+
+    __slots__ = ("bucket_size", "_amounts", "_buckets", "_maxes", "_sizes")
+
+    def __init__(self, entries: Iterable[tuple[int, int]] = (), *, bucket_size: int = 1000):
+        self.bucket_size = bucket_size
+
+        self._amounts = {user_id: amount for user_id, amount in entries if amount > 0}
+
+        keys = sorted(_make_key(user_id, amount) for user_id, amount in self._amounts.items())
+
+        self._buckets = [keys[i : i + bucket_size] for i in range(0, len(keys), bucket_size)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._sizes = _FenwickTree([len(bucket) for bucket in self._buckets])
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._amounts
+
+    def get(self, user_id: int) -> int:
+        return self._amounts.get(user_id, 0)
+
+    def set(self, user_id: int, amount: int) -> None:
+        prev = self._amounts.get(user_id, 0)
+
+        if prev == amount:
+            return
+
+        if prev > 0:
+            self._remove_key(_make_key(user_id, prev))
+            del self._amounts[user_id]
+
+        if amount > 0:
+            self._insert_key(_make_key(user_id, amount))
+            self._amounts[user_id] = amount
+
+    def add(self, user_id: int, delta: int) -> int:
+        amount = self.get(user_id) + delta
+        self.set(user_id, amount)
+        return amount
+
+    def discard(self, user_id: int) -> None:
+        self.set(user_id, 0)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Returns the 1-based position of the user on the leaderboard"""
+
+        amount = self._amounts.get(user_id)
+
+        if amount is None:
+            return None
+
+        key = _make_key(user_id, amount)
+        bucket_idx = bisect_left(self._maxes, key)
+
+        return self._sizes.prefix_sum(bucket_idx) + bisect_left(self._buckets[bucket_idx], key) + 1
+
+    def top(self, n: int) -> Iterator[tuple[int, int]]:
+        """Yields (user_id, amount) of the first n users on the leaderboard"""
+
+        for bucket in self._buckets:
+            for key in bucket:
+                if n <= 0:
+                    return
+
+                yield _split_key(key)
+                n -= 1
+
+    def _rebuild_sizes(self) -> None:
+        self._sizes = _FenwickTree([len(bucket) for bucket in self._buckets])
+
+    def _insert_key(self, key: int) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._rebuild_sizes()
+            return
+
+        bucket_idx = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[bucket_idx]
+
+        insort(bucket, key)
+        self._maxes[bucket_idx] = bucket[-1]
+
+        if len(bucket) > self.bucket_size * 2:
+            half = len(bucket) // 2
+            self._buckets[bucket_idx : bucket_idx + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[bucket_idx : bucket_idx + 1] = [bucket[half - 1], bucket[-1]]
+            self._rebuild_sizes()
+        else:
+            self._sizes.add(bucket_idx, 1)
+
+    def _remove_key(self, key: int) -> None:
+        bucket_idx = bisect_left(self._maxes, key)
+        bucket = self._buckets[bucket_idx]
+
+        del bucket[bisect_left(bucket, key)]
+
+        if bucket:
+            self._maxes[bucket_idx] = bucket[-1]
+            self._sizes.add(bucket_idx, -1)
+        else:
+            del self._buckets[bucket_idx]
+            del self._maxes[bucket_idx]
+            self._rebuild_sizes()
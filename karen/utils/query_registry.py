@@ -0,0 +1,92 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class UnknownQueryError(Exception):
+    """Raised when a query id is used which hasn't been registered (i.e. after a restart of Karen)"""
+
+    def __init__(self, query_id: int):
+        super().__init__(f"Unknown query id: {query_id}")
+        self.query_id = query_id
+
+
+def get_query_id(query: str) -> int:
+    """Derives a stable id from the query text, so ids survive restarts and can't map to the wrong query"""
+
+    return int.from_bytes(hashlib.blake2b(query.encode(), digest_size=8).digest(), "big") >> 1
+
+
+class QueryStats:
+    __slots__ = ("calls", "errors", "total_time", "max_time")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class QueryRegistry:
+    """Keeps track of queries registered by the clusters and their latency stats"""
+
+    def __init__(self):
+        self._queries = dict[int, str]()  # query_id: query
+        self._stats = dict[int, QueryStats]()  # query_id: stats
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def register(self, query: str) -> int:
+        query_id = get_query_id(query)
+
+        if query_id not in self._queries:
+            self._queries[query_id] = query
+            self._stats[query_id] = QueryStats()
+
+        return query_id
+
+    def get(self, query_id: int) -> str:
+        try:
+            return self._queries[query_id]
+        except KeyError:
+            raise UnknownQueryError(query_id)
+
+    @contextmanager
+    def timed(self, query_id: int) -> Iterator[str]:
+        """Yields the query for the given id and records how long the body of the with block took"""
+
+        query = self.get(query_id)
+        stats = self._stats[query_id]
+
+        start = time.perf_counter()
+
+        try:
+            yield query
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+
+    def get_stats(self, limit: int) -> list[dict]:
+        """Returns stats for the queries with the highest total time spent"""
+
+        query_ids = sorted(self._stats, key=(lambda q: self._stats[q].total_time), reverse=True)
+
+        return [
+            {
+                "query": self._queries[query_id],
+                "calls": (stats := self._stats[query_id]).calls,
+                "errors": stats.errors,
+                "total_time": stats.total_time,
+                "mean_time": (stats.total_time / stats.calls) if stats.calls else 0.0,
+                "max_time": stats.max_time,
+            }
+            for query_id in query_ids[:limit]
+        ]
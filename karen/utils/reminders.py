@@ -0,0 +1,109 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import time
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Optional
+
+# called with the due reminders, returns the ones which couldn't be delivered
+T_REMINDERS_CALLBACK = Callable[[list[dict[str, Any]]], Awaitable[list[dict[str, Any]]]]
+
+
+class ReminderScheduler:
+    """Min-heap of upcoming reminders which calls the callback with reminders as soon as they're due
+
+    Only reminders due within the horizon (in seconds) are kept in memory, the rest have to be pushed
+    again once they enter it. Reminders which fail to be delivered are retried after retry_delay."""
+
+    def __init__(
+        self,
+        callback: T_REMINDERS_CALLBACK,
+        horizon: float,
+        logger: logging.Logger,
+        *,
+        retry_delay: float = 60,
+    ):
+        self.horizon = horizon
+        self.retry_delay = retry_delay
+
+        self._callback = callback
+        self._logger = logger
+
+        self._heap = list[tuple[float, int]]()  # (due at unix timestamp, reminder id)
+        self._reminders = dict[int, dict[str, Any]]()  # reminder id: reminder
+        self._delivering = set[int]()  # ids of the reminders passed to the callback
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._reminders)
+
+    def push(self, reminder: dict[str, Any]) -> bool:
+        """Schedules a reminder (a dict with at least an id and an at datetime) if it's within the horizon"""
+
+        due_at = reminder["at"].timestamp()
+
+        if (
+            reminder["id"] in self._reminders
+            or reminder["id"] in self._delivering
+            or due_at > time.time() + self.horizon
+        ):
+            return False
+
+        self._reminders[reminder["id"]] = reminder
+        heapq.heappush(self._heap, (due_at, reminder["id"]))
+
+        # the new reminder is due before whatever the scheduler is sleeping until
+        if self._heap[0][1] == reminder["id"]:
+            self._wakeup.set()
+
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _pop_due(self) -> list[dict[str, Any]]:
+        now = time.time()
+        due = list[dict[str, Any]]()
+
+        while self._heap and self._heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(self._heap)
+            due.append(self._reminders.pop(reminder_id))
+            self._delivering.add(reminder_id)
+
+        return due
+
+    async def _call_callback(self, reminders: list[dict[str, Any]]) -> None:
+        try:
+            failed = await self._callback(reminders)
+        except Exception:
+            self._logger.error("An error occurred while delivering reminders", exc_info=True)
+            failed = reminders
+        finally:
+            self._delivering.difference_update(r["id"] for r in reminders)
+
+        retry_at = datetime.datetime.fromtimestamp(
+            time.time() + self.retry_delay, datetime.timezone.utc
+        )
+
+        for reminder in failed:
+            self.push({**reminder, "at": retry_at})
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            if due := self._pop_due():
+                asyncio.create_task(self._call_callback(due))
+
+            timeout = (self._heap[0][0] - time.time()) if self._heap else None
+
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
@@ -12,6 +12,7 @@ async def setup_database_pool(secrets: DatabaseSecrets) -> asyncpg.Pool:
         password=secrets.auth,
         max_size=secrets.pool_size,
         min_size=1,
+        statement_cache_size=secrets.statement_cache_size,
     )
 
     return pool  # type: ignore
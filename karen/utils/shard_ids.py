@@ -1,4 +1,5 @@
 import uuid
+from typing import Optional
 
 
 class ShardIdManager:
@@ -23,6 +24,15 @@ class ShardIdManager:
 
         return shard_ids
 
+    def get_ws_id(self, shard_id: int) -> Optional[uuid.UUID]:
+        """Returns the id of the websocket connection of the cluster which has the shard"""
+
+        for ws_id, shard_ids in self._taken_shards.items():
+            if shard_id in shard_ids:
+                return ws_id
+
+        return None
+
     def release(self, ws_id: uuid.UUID) -> None:
         if ws_id not in self._taken_shards:
             return
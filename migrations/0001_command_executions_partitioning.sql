@@ -0,0 +1,53 @@
+-- Converts command_executions into a table partitioned by month and backfills the hourly rollup.
+-- Run once on databases created before the partitioned layout was added to setup.sql, with Karen stopped.
+
+BEGIN;
+
+ALTER TABLE command_executions RENAME TO command_executions_old;
+
+CREATE TABLE command_executions (
+  user_id            BIGINT NOT NULL,
+  guild_id           BIGINT,
+  command            VARCHAR(300) NOT NULL,
+  is_slash           BOOLEAN NOT NULL,
+  at                 TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (at);
+
+DO $$
+DECLARE
+  month TIMESTAMPTZ;
+BEGIN
+  FOR month IN
+    SELECT GENERATE_SERIES(DATE_TRUNC('MONTH', MIN(at)), DATE_TRUNC('MONTH', NOW()) + INTERVAL '1 MONTH', '1 MONTH')
+    FROM command_executions_old
+  LOOP
+    EXECUTE FORMAT(
+      'CREATE TABLE command_executions_%s PARTITION OF command_executions FOR VALUES FROM (%L) TO (%L)',
+      TO_CHAR(month, 'YYYY_MM'), month, month + INTERVAL '1 MONTH'
+    );
+  END LOOP;
+END $$;
+
+CREATE TABLE command_executions_default PARTITION OF command_executions DEFAULT;
+
+INSERT INTO command_executions SELECT * FROM command_executions_old;
+
+CREATE INDEX command_executions_user_id_at_idx ON command_executions (user_id, at);
+
+CREATE TABLE command_executions_hourly (
+  hour               TIMESTAMPTZ NOT NULL,
+  guild_id           BIGINT NOT NULL,
+  user_id            BIGINT NOT NULL,
+  count              INT NOT NULL,
+  PRIMARY KEY (hour, guild_id, user_id)
+);
+
+INSERT INTO command_executions_hourly (hour, guild_id, user_id, count)
+SELECT DATE_TRUNC('HOUR', at), COALESCE(guild_id, 0), user_id, COUNT(*)
+FROM command_executions_old GROUP BY 1, 2, 3;
+
+CREATE INDEX command_executions_hourly_guild_id_idx ON command_executions_hourly (guild_id, hour);
+
+DROP TABLE command_executions_old;
+
+COMMIT;
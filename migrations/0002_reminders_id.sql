@@ -0,0 +1,5 @@
+-- Adds the id and guild_id columns to reminders, used by Karen's reminder scheduler.
+-- Existing reminders have no guild_id and are broadcast to every cluster like before.
+
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS id BIGSERIAL PRIMARY KEY;
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS guild_id BIGINT;
@@ -0,0 +1,3 @@
+-- Adds users.health_at, health is now regenerated lazily when users are loaded instead of by a loop in Karen.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS health_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
@@ -0,0 +1,16 @@
+-- Stores farm plots as batches of seeds planted together instead of one row per seed.
+
+BEGIN;
+
+ALTER TABLE farm_plots ADD COLUMN IF NOT EXISTS amount INT NOT NULL DEFAULT 1;
+
+CREATE TEMPORARY TABLE farm_plots_batched ON COMMIT DROP AS
+SELECT user_id, crop_type, planted_at, grow_time, SUM(amount)::INT AS amount
+FROM farm_plots GROUP BY user_id, crop_type, planted_at, grow_time;
+
+DELETE FROM farm_plots;
+
+INSERT INTO farm_plots (user_id, crop_type, planted_at, grow_time, amount)
+SELECT user_id, crop_type, planted_at, grow_time, amount FROM farm_plots_batched;
+
+COMMIT;
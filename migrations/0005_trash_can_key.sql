@@ -0,0 +1,18 @@
+-- Keys the trash can by (user_id, item) so finds are added to one row per item instead of appended.
+
+BEGIN;
+
+CREATE TEMPORARY TABLE trash_can_merged ON COMMIT DROP AS
+-- the amount-weighted value keeps SUM(value * amount), which is what emptying the trash can pays out
+SELECT user_id, item, COALESCE(SUM(value * amount) / NULLIF(SUM(amount), 0), MAX(value)) AS value, SUM(amount)::BIGINT AS amount
+FROM trash_can WHERE user_id IS NOT NULL GROUP BY user_id, item;
+
+DELETE FROM trash_can;
+
+INSERT INTO trash_can (user_id, item, value, amount)
+SELECT user_id, item, value, amount FROM trash_can_merged;
+
+DROP INDEX IF EXISTS trash_can_user_id_idx;
+ALTER TABLE trash_can ADD PRIMARY KEY (user_id, item);
+
+COMMIT;
@@ -0,0 +1,14 @@
+-- Stamps leaderboards.week with the start of the week in UTC instead of in the session's timezone.
+
+BEGIN;
+
+ALTER TABLE leaderboards
+ALTER COLUMN week SET DEFAULT (DATE_TRUNC('WEEK', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC');
+
+-- existing stamps are at most a timezone offset away from the start of their week in UTC, so they're
+-- shifted into the middle of the week before truncating to keep them in the same week
+UPDATE leaderboards
+SET week = DATE_TRUNC('WEEK', (week + INTERVAL '3 DAYS') AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+WHERE week <> DATE_TRUNC('WEEK', week AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+
+COMMIT;
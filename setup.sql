@@ -13,7 +13,8 @@ CREATE TABLE IF NOT EXISTS users ( -- used for economy data
   emeralds           BIGINT NOT NULL DEFAULT 0, -- the amount of emeralds the user has
   vault_balance      INT NOT NULL DEFAULT 0, -- the amount of emerald blocks in their vault
   vault_max          INT NOT NULL DEFAULT 1, -- the maximum amount of emerald blocks in their vault
-  health             SMALLINT NOT NULL DEFAULT 20, -- the amount of health the user currently has
+  health             SMALLINT NOT NULL DEFAULT 20, -- the amount of health the user had at health_at
+  health_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(), -- health regenerates from this point on, see models/db/user.py
   vote_streak        INT NOT NULL DEFAULT 0, -- the current vote streak of the user
   last_vote          TIMESTAMPTZ, -- the time at which the last user voted
   give_alert         BOOLEAN NOT NULL DEFAULT true, -- whether users should be alerted if someone gives them items or emeralds or not
@@ -29,11 +30,15 @@ CREATE TABLE IF NOT EXISTS items (
   sellable           BOOLEAN NOT NULL -- whether the item can be sold to the bot
 );
 
+CREATE INDEX IF NOT EXISTS items_user_id_name_idx ON items (user_id, LOWER(name));
+CREATE INDEX IF NOT EXISTS items_name_amount_idx ON items (LOWER(name), amount DESC); -- item leaderboards and stats
+
 CREATE TABLE IF NOT EXISTS trash_can (
   user_id            BIGINT REFERENCES users (user_id) ON DELETE CASCADE, -- the discord user id / snowflake
   item               VARCHAR(50) NOT NULL, -- name of item,
   value              FLOAT NOT NULL,
-  amount             BIGINT NOT NULL
+  amount             BIGINT NOT NULL,
+  PRIMARY KEY (user_id, item)
 );
 
 CREATE TABLE IF NOT EXISTS badges (
@@ -63,7 +68,7 @@ CREATE TABLE IF NOT EXISTS leaderboards (  -- stores leaderboards which aren't s
   trash_emptied      BIGINT NOT NULL DEFAULT 0,
   week_emeralds      BIGINT NOT NULL DEFAULT 0,
   week_commands      BIGINT NOT NULL DEFAULT 0,
-  week               TIMESTAMPTZ NOT NULL DEFAULT DATE_TRUNC('WEEK', NOW())
+  week               TIMESTAMPTZ NOT NULL DEFAULT (DATE_TRUNC('WEEK', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC')  -- start of the week (in UTC) the week_ columns are for
 );
 
 -- CREATE TABLE IF NOT EXISTS pets (
@@ -81,9 +86,13 @@ CREATE TABLE IF NOT EXISTS farm_plots (
   user_id            BIGINT REFERENCES users (user_id) ON DELETE CASCADE,
   crop_type          VARCHAR NOT NULL,
   planted_at         TIMESTAMPTZ NOT NULL,
-  grow_time          INTERVAL NOT NULL
+  grow_time          INTERVAL NOT NULL,
+  amount             INT NOT NULL DEFAULT 1 -- the amount of seeds planted together in this batch
 );
 
+-- planted_at + grow_time can't be indexed (timestamptz + interval isn't immutable), plots are filtered per user instead
+CREATE INDEX IF NOT EXISTS farm_plots_user_id_planted_at_idx ON farm_plots (user_id, planted_at);
+
 CREATE TABLE IF NOT EXISTS give_logs (
   item               VARCHAR(250) NOT NULL, -- item traded / given, "emerald" for emeralds
   amount             BIGINT NOT NULL, -- the amount of the item
@@ -92,14 +101,23 @@ CREATE TABLE IF NOT EXISTS give_logs (
   receiver           BIGINT NOT NULL -- who received the items
 );
 
+-- separate indexes so sender = $1 OR receiver = $1 can be answered with a BitmapOr
+CREATE INDEX IF NOT EXISTS give_logs_sender_at_idx ON give_logs (sender, at DESC);
+CREATE INDEX IF NOT EXISTS give_logs_receiver_at_idx ON give_logs (receiver, at DESC);
+
 CREATE TABLE IF NOT EXISTS reminders (
+  id                 BIGSERIAL PRIMARY KEY,
   user_id            BIGINT NOT NULL, -- the discord user id / snowflake
+  guild_id           BIGINT, -- the guild the reminder was made in, used to route it to the right cluster
   channel_id         BIGINT NOT NULL, -- the channel id where the reminder command was summoned
   message_id         BIGINT NOT NULL, -- the message where the reminder command was summoned
   reminder           TEXT NOT NULL, -- the actual text for the reminder
   at                 TIMESTAMPTZ -- the time at which the user should be reminded
 );
 
+CREATE INDEX IF NOT EXISTS reminders_at_idx ON reminders (at);
+CREATE INDEX IF NOT EXISTS reminders_user_id_idx ON reminders (user_id);
+
 CREATE TABLE IF NOT EXISTS warnings (
   user_id            BIGINT NOT NULL,  -- the discord user id / snowflake
   guild_id           BIGINT NOT NULL, -- the guild where the user was warned
@@ -107,11 +125,15 @@ CREATE TABLE IF NOT EXISTS warnings (
   reason             VARCHAR(250) -- the reason for the warning (optional)
 );
 
+CREATE INDEX IF NOT EXISTS warnings_user_id_guild_id_idx ON warnings (user_id, guild_id);
+
 CREATE TABLE IF NOT EXISTS disabled_commands (
   guild_id           BIGINT NOT NULL,  -- the guild id where the command is disabled
   command            VARCHAR(20) NOT NULL -- the real name of the command that's disabled
 );
 
+CREATE INDEX IF NOT EXISTS disabled_commands_guild_id_idx ON disabled_commands (guild_id, command);
+
 CREATE TABLE IF NOT EXISTS user_rcon (
   user_id            BIGINT NOT NULL, -- the discord user id / snowflake
   mc_server          VARCHAR(50) NOT NULL, -- the minecraft server address, including the port
@@ -119,6 +141,8 @@ CREATE TABLE IF NOT EXISTS user_rcon (
   password           VARCHAR(300) NOT NULL -- the encrypted password to login to the RCON server
 );
 
+CREATE INDEX IF NOT EXISTS user_rcon_user_id_idx ON user_rcon (user_id, mc_server);
+
 CREATE TABLE IF NOT EXISTS guild_events (
   guild_id           BIGINT NOT NULL,
   event_type         SMALLINT NOT NULL, -- enum: data/enums/guild_event_type.py
@@ -127,10 +151,30 @@ CREATE TABLE IF NOT EXISTS guild_events (
   event_at           TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
-CREATE TABLE IF NOT EXISTS command_executions (
+CREATE TABLE IF NOT EXISTS guild_members ( -- non-bot members of guilds, used for local leaderboards
+  guild_id           BIGINT NOT NULL,
+  user_id            BIGINT NOT NULL,
+  PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS command_executions ( -- partitioned by month, partitions are created by Karen
   user_id            BIGINT NOT NULL,
   guild_id           BIGINT,
   command            VARCHAR(300) NOT NULL,
   is_slash           BOOLEAN NOT NULL,
   at                 TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (at);
+
+CREATE TABLE IF NOT EXISTS command_executions_default PARTITION OF command_executions DEFAULT;
+
+CREATE INDEX IF NOT EXISTS command_executions_user_id_at_idx ON command_executions (user_id, at);
+
+CREATE TABLE IF NOT EXISTS command_executions_hourly ( -- rollup of command_executions, maintained by Karen
+  hour               TIMESTAMPTZ NOT NULL,
+  guild_id           BIGINT NOT NULL, -- 0 for commands ran in dms
+  user_id            BIGINT NOT NULL,
+  count              INT NOT NULL,
+  PRIMARY KEY (hour, guild_id, user_id)
 );
+
+CREATE INDEX IF NOT EXISTS command_executions_hourly_guild_id_idx ON command_executions_hourly (guild_id, hour);
@@ -0,0 +1,179 @@
+import asyncio
+import functools
+import itertools
+import json
+import random
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from common.coms.packet import Packet
+from common.coms.packet_type import PacketType
+from common.models.data import Data
+from common.utils.command_usage import CommandUsage, track_command
+
+from bot.cogs.commands import econ
+from bot.cogs.commands.econ import Econ
+from bot.cogs.core.badges import Badges
+from bot.cogs.core.database import Database
+from bot.models.translation import Translation
+from bot.utils.database_proxy import DatabaseProxy
+from bot.utils.karen_client import KarenClient
+
+ROOT = Path(__file__).parents[4]
+RUNS = 300  # enough for every branch of the commands to be taken
+
+USER_ID = 1
+VICTIM_ID = 2
+
+
+class FakeKarenConnection:
+    """Stands in for the websocket connection to Karen, answering database queries by their text"""
+
+    def __init__(self):
+        self._queries = dict[int, str]()  # query id: query
+        self._query_ids = itertools.count(1)
+        self._badges = set[int]()  # users who have a badges row
+
+    def _query(self, packet_type: PacketType, query: str, args: list[Any]) -> Any:
+        if packet_type == PacketType.DB_FETCH_VAL:
+            return 1000  # emeralds
+
+        if packet_type == PacketType.DB_FETCH_ROW:
+            if "FROM badges" in query:
+                if args[0] not in self._badges:
+                    self._badges.add(args[0])  # inserted by the caller
+                    return None
+
+                columns = query.removeprefix("SELECT ").split(" FROM ")[0].split(", ")
+                return dict.fromkeys(columns, 0)
+
+            if "FROM users" in query:
+                return {"user_id": args[0], "emeralds": 1000, "vault_max": 1}
+
+            return None  # items the users don't have
+
+        if packet_type == PacketType.DB_FETCH_ALL:
+            if "SELECT * FROM items" in query:
+                return [
+                    {"name": name, "sell_price": 0, "amount": 1, "sticky": True, "sellable": False}
+                    for name in ("Pico de Madera", "Espada de Madera")
+                ]
+
+            if "LOWER(name) AS name" in query:  # fetch_owned
+                return [{"name": name, "amount": 1} for name in args[1] if name == "caña de pesca"]
+
+            return []
+
+        return None
+
+    async def send(self, packet_type: PacketType, data: dict[str, Any]) -> Packet:
+        if packet_type == PacketType.DB_PREPARE:
+            query_id = next(self._query_ids)
+            self._queries[query_id] = data["query"]
+            result = query_id
+        elif "query_id" in data:
+            result = self._query(packet_type, self._queries[data["query_id"]], list(data["args"]))
+        else:
+            result = {
+                PacketType.MINE_COMMAND: 0,
+                PacketType.ACTIVE_FX_CHECK: False,
+                PacketType.LEADERBOARD_UPDATE: 1,
+            }.get(packet_type)
+
+        return Packet(id="0", data=result)
+
+
+@functools.cache
+def load_data() -> Data:
+    return Data.parse_file(ROOT / "common" / "data" / "data.json")
+
+
+@functools.cache
+def load_translation() -> Translation:
+    with open(ROOT / "bot" / "data" / "text" / "es.json", encoding="utf8") as f:
+        return Translation(**json.load(f)["es"])
+
+
+def make_econ() -> Econ:
+    d = load_data()
+
+    karen = KarenClient.__new__(KarenClient)
+    karen._client = FakeKarenConnection()
+
+    cogs = {}
+    bot = SimpleNamespace(
+        d=d,
+        karen=karen,
+        user=SimpleNamespace(id=0),
+        existing_users_cache=set[int](),
+        get_cog=cogs.get,
+        send_embed=(lambda *a, **kw: asyncio.sleep(0)),
+    )
+
+    database = cogs["Database"] = Database.__new__(Database)  # skips populating the caches
+    database.bot, database.d, database.karen = bot, d, karen
+    database.db = DatabaseProxy(karen)
+
+    cogs["Badges"] = Badges(bot)
+    cogs["Fun"] = SimpleNamespace(meme=(lambda ctx: asyncio.sleep(0)))
+
+    return Econ(bot)
+
+
+def make_ctx() -> SimpleNamespace:
+    @asynccontextmanager
+    async def typing():
+        yield
+
+    async def reply_embed(*args, **kwargs):
+        pass
+
+    return SimpleNamespace(
+        author=SimpleNamespace(id=USER_ID, mention="<@1>"),
+        guild=SimpleNamespace(get_member=(lambda user_id: user_id)),
+        l=load_translation(),
+        typing=typing,
+        reply_embed=reply_embed,
+    )
+
+
+async def worst_usage(command_name: str, **kwargs: Any) -> CommandUsage:
+    """Runs the command many times, returning the most packets and queries any one invocation made
+
+    Every run starts from scratch (new users, no queries registered with Karen) to find the worst case."""
+
+    worst = CommandUsage(command_name)
+
+    for _ in range(RUNS):
+        cog = make_econ()
+        command = getattr(cog, command_name)
+
+        with track_command(command.qualified_name) as usage:
+            await command.callback(cog, make_ctx(), **kwargs)
+
+        worst.karen_packets = max(worst.karen_packets, usage.karen_packets)
+        worst.db_queries = max(worst.db_queries, usage.db_queries)
+
+    return worst
+
+
+@pytest.mark.parametrize("command_name", ["mine", "fish", "pillage"])
+def test_econ_query_budgets(monkeypatch: pytest.MonkeyPatch, command_name: str):
+    random.seed(0)
+
+    async def sleep(delay: float) -> None:
+        pass
+
+    # fishing waits for up to half a minute
+    monkeypatch.setattr(econ, "asyncio", SimpleNamespace(sleep=sleep, gather=asyncio.gather))
+
+    kwargs = (
+        {"victim": SimpleNamespace(id=VICTIM_ID, bot=False)} if command_name == "pillage" else {}
+    )
+    usage = asyncio.run(worst_usage(command_name, **kwargs))
+
+    usage.check_budget(**getattr(Econ, command_name).extras["query_budget"])
@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Iterable, Optional
+
+from bot.cogs.core.database import Database
+
+
+class FakeDb:
+    """Records the queries it's sent, fetchrow returns the given rows in order"""
+
+    def __init__(self, rows: Iterable[Optional[dict[str, Any]]] = ()):
+        self.queries = list[tuple[str, tuple[Any, ...]]]()
+        self.rows = list(rows)
+
+    async def execute(self, query: str, *args: Any) -> str:
+        self.queries.append((query, args))
+        return ""
+
+    async def fetchrow(self, query: str, *args: Any) -> Optional[dict[str, Any]]:
+        self.queries.append((query, args))
+        return self.rows.pop(0)
+
+
+def make_database() -> Database:
+    database = Database.__new__(Database)  # skips populating the caches
+    database.db = FakeDb()
+    database.bot = SimpleNamespace(synced_member_guilds=set[int](), existing_users_cache=set[int]())
+
+    return database
+
+
+def make_guild(chunked: bool) -> SimpleNamespace:
+    members = [SimpleNamespace(id=1, bot=False), SimpleNamespace(id=2, bot=True)]
+    return SimpleNamespace(id=100, chunked=chunked, members=members)
+
+
+def test_ensure_guild_members_unchunked():
+    database = make_database()
+
+    asyncio.run(database.ensure_guild_members(make_guild(chunked=False)))
+
+    [(query, args)] = database.db.queries
+    assert "DELETE" not in query  # the member list is partial, so nobody can be removed
+    assert args == (100, [1])
+    assert 100 not in database.bot.synced_member_guilds
+
+
+def test_ensure_guild_members_chunked():
+    database = make_database()
+    guild = make_guild(chunked=True)
+
+    asyncio.run(database.ensure_guild_members(guild))
+    asyncio.run(database.ensure_guild_members(guild))  # already synced
+
+    [(query, args)] = database.db.queries
+    assert "DELETE" in query
+    assert args == (100, [1])
+    assert 100 in database.bot.synced_member_guilds
+
+
+def test_fetch_user_created_concurrently():
+    database = make_database()
+    # not found, then the insert conflicts with one committed after the snapshot so nothing is returned
+    database.db = FakeDb([None, None, {"user_id": 1, "emeralds": 5}])
+
+    user = asyncio.run(database.fetch_user(1))
+
+    assert (user.user_id, user.emeralds) == (1, 5)
+    assert len(database.db.queries) == 3
+    assert 1 in database.bot.existing_users_cache
@@ -0,0 +1,18 @@
+from common.data.enums.cache_topic import CacheTopic
+
+from bot.utils.cache_subscriptions import CacheSubscriptions
+
+
+def test_dispatch():
+    applied = []
+    subscriptions = CacheSubscriptions(max_versions=2)
+    subscriptions.subscribe(CacheTopic.BOTBAN, (lambda k, v: applied.append((k, v))))
+
+    assert subscriptions.dispatch(CacheTopic.BOTBAN, 1, True, 2)
+    assert not subscriptions.dispatch(CacheTopic.BOTBAN, 1, False, 1)  # older than the last one
+
+    for key in (2, 3):
+        subscriptions.dispatch(CacheTopic.BOTBAN, key, True, 3)
+
+    assert len(subscriptions._versions) == 2  # the version of key 1 was forgotten
+    assert applied == [(1, True), (2, True), (3, True)]
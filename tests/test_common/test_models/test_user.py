@@ -0,0 +1,19 @@
+import datetime
+
+from common.models.db.user import HEALTH_REGEN_INTERVAL, MAX_HEALTH, User
+
+
+def make_user(health: int, since_health_at: datetime.timedelta) -> User:
+    health_at = datetime.datetime.now(datetime.timezone.utc) - since_health_at
+    return User(user_id=1, health=health, health_at=health_at)
+
+
+def test_health_regen():
+    assert make_user(5, HEALTH_REGEN_INTERVAL * 3.5).health == 8
+    assert make_user(5, datetime.timedelta(0)).health == 5
+
+
+def test_health_regen_capped():
+    assert make_user(15, HEALTH_REGEN_INTERVAL * 100).health == MAX_HEALTH
+    assert make_user(MAX_HEALTH, HEALTH_REGEN_INTERVAL * 100).health == MAX_HEALTH
+    assert User(user_id=1, health=3).health == 3
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from common.utils.cache import LRUCache, get_caches
+
+
+def test_lru_eviction():
+    cache = LRUCache[int, str](3)
+
+    for i in range(3):
+        cache[i] = str(i)
+
+    assert 0 in cache  # marks 0 as recently used
+    cache[3] = "3"
+
+    assert 1 not in cache
+    assert [cache.get(i) for i in (0, 2, 3)] == ["0", "2", "3"]
+    assert len(cache) == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry(monkeypatch: pytest.MonkeyPatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache = LRUCache[str, int](10, ttl=5)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 3)
+    cache["b"] = 3  # refreshes the ttl of b
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get("a") is None
+    assert cache.clear_expired() == []
+    assert cache.get("b") == 3
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 9)
+    assert cache.clear_expired() == [("b", 3)]
+    assert len(cache) == 0
+    assert cache.expirations == 2
+
+
+def test_on_evict(monkeypatch: pytest.MonkeyPatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    evicted = []
+    cache = LRUCache[str, int](2, ttl=5, on_evict=(lambda k, v: evicted.append((k, v))))
+
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["c"] = 3  # full, evicts a
+    cache.pop("b")  # removed explicitly, so not evicted
+    cache["d"] = 4
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert "c" not in cache  # expired on lookup
+    cache.clear_expired()
+
+    assert evicted == [("a", 1), ("c", 3), ("d", 4)]
+
+
+def test_stats():
+    cache = LRUCache[int, None](2, name="test_stats")
+    cache.add(1)
+
+    assert 1 in cache
+    assert 2 not in cache
+    assert cache.stats()["hit_rate"] == 0.5
+    assert cache in get_caches()
+
+
+@pytest.mark.parametrize("maxsize, ttl", [(0, None), (1, 0), (1, -1)])
+def test_invalid_args(maxsize, ttl):
+    with pytest.raises(ValueError):
+        LRUCache(maxsize, ttl)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from common.utils.command_usage import (
+    CommandUsage,
+    CommandUsageStats,
+    QueryBudgetExceededError,
+    current_usage,
+    record_db_query,
+    record_karen_packet,
+    start_command,
+    track_command,
+)
+
+
+def test_track_command():
+    record_db_query()  # not attributed to anything
+    assert current_usage() is None
+
+    with track_command("mine") as usage:
+        record_karen_packet(0.5)
+        record_db_query()
+        record_db_query()
+
+        assert current_usage() is usage
+
+    assert current_usage() is None
+    assert (usage.karen_packets, usage.db_queries, usage.karen_time) == (1, 2, 0.5)
+
+
+def test_tasks_are_isolated():
+    async def invoke(command: str, queries: int) -> CommandUsage:
+        usage = start_command(command)
+
+        for _ in range(queries):
+            await asyncio.sleep(0)
+            record_db_query()
+
+        return usage
+
+    async def main():
+        return await asyncio.gather(invoke("mine", 3), invoke("fish", 5))
+
+    mine, fish = asyncio.run(main())
+
+    assert (mine.command, mine.db_queries) == ("mine", 3)
+    assert (fish.command, fish.db_queries) == ("fish", 5)
+    assert current_usage() is None
+
+
+def test_stats():
+    stats = CommandUsageStats()
+
+    for queries in (1, 4):
+        with track_command("mine") as usage:
+            for _ in range(queries):
+                record_db_query()
+
+        stats.record(usage)
+
+    [mine] = stats.stats()
+
+    assert mine["calls"] == 2
+    assert mine["db_queries"] == 5
+    assert mine["max_db_queries"] == 4
+
+
+def test_budget():
+    with track_command("mine") as usage:
+        record_karen_packet(0.0)
+        record_db_query()
+        record_db_query()
+
+    usage.check_budget(max_karen_packets=1, max_db_queries=2)
+
+    with pytest.raises(QueryBudgetExceededError):
+        usage.check_budget(max_db_queries=1)
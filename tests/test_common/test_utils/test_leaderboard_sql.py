@@ -0,0 +1,15 @@
+from common.utils.leaderboard_sql import CURRENT_WEEK, current_value, leaderboards_set_clause
+
+
+def test_set_clause():
+    assert leaderboards_set_clause({"commands": "{current} + $2"}) == (
+        "commands = leaderboards.commands + $2"
+    )
+
+    # updating one weekly leaderboard resets the others if the row is from a previous week
+    clause = leaderboards_set_clause({"week_commands": "{current} + $2"})
+
+    assert f"week_emeralds = {current_value('week_emeralds')}" in clause
+    assert f"week_commands = {current_value('week_commands')} + $2" in clause
+    assert clause.endswith(f"week = {CURRENT_WEEK}")
+    assert "UTC" in CURRENT_WEEK
@@ -0,0 +1,126 @@
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+from common.models.data import Data, Findable
+from common.utils.loot_table import LootTable
+
+DRAWS = 20_000
+SLOW_DRAWS = 2_000  # for the old rolls which loop until something is found, they're really slow
+
+DATA_FILE = Path(__file__).parents[3] / "common" / "data" / "data.json"
+
+
+def _key(outcome: Any) -> Any:
+    # findables aren't hashable, so they're counted by item name
+    return outcome.item if isinstance(outcome, Findable) else outcome
+
+
+def assert_same_distribution(
+    old: Callable[[], Any], new: Callable[[], Any], draws: int = DRAWS
+) -> None:
+    """Draws from both and checks the frequency of every outcome is within 5 standard deviations"""
+
+    old_counts = Counter(_key(old()) for _ in range(draws))
+    new_counts = Counter(_key(new()) for _ in range(draws))
+
+    for outcome in old_counts.keys() | new_counts.keys():
+        p = (old_counts[outcome] + new_counts[outcome]) / (2 * draws)
+        sigma = (p * (1 - p) * 2 / draws) ** 0.5
+
+        assert abs(old_counts[outcome] - new_counts[outcome]) / draws <= 5 * sigma + 1e-4, outcome
+
+
+def first_success(outcomes: list, chances: list[float]):
+    for outcome, chance in zip(outcomes, chances):
+        if random.random() < chance:
+            return outcome
+
+    return None
+
+
+def test_weights():
+    random.seed(0)
+    table = LootTable("abcd", [1, 2, 3, 0])
+
+    assert table.probabilities == [1 / 6, 2 / 6, 3 / 6, 0]
+    assert_same_distribution((lambda: random.choices("abcd", [1, 2, 3, 0])[0]), table.draw)
+
+
+def test_sequential_rolls():
+    random.seed(0)
+    outcomes, chances = ["a", "b", "c"], [0.1, 0.3, 0.05]
+
+    def old_rounds():
+        for _ in range(3):
+            if (found := first_success(outcomes, chances)) is not None:
+                return found
+
+        return None
+
+    def old_until_found():
+        while (found := first_success(outcomes, chances)) is None:
+            pass
+
+        return found
+
+    assert_same_distribution(
+        old_rounds, LootTable.from_sequential_rolls(outcomes, chances, rounds=3).draw
+    )
+    assert_same_distribution(
+        old_until_found, LootTable.from_sequential_rolls(outcomes, chances, until_found=True).draw
+    )
+
+
+def test_data_loot_tables():
+    """Checks the loot tables match the rolls the econ commands used to do"""
+
+    random.seed(0)
+    d = Data.parse_file(DATA_FILE)
+
+    def old_mine(lucky: bool):
+        for item in d.mining.findables:
+            if random.randint(0, item.rarity) == 1 or (
+                lucky and random.randint(0, item.rarity) < 3
+            ):
+                return item
+
+        return None
+
+    def old_until_found(findables):
+        while True:
+            for item in findables:
+                if random.randint(0, (item.rarity // 2) + 2) == 1:
+                    return item
+
+    def old_barrel():
+        for _ in range(20):
+            for item in d.mining.findables:
+                if item.rarity > 1000 and random.randint(0, int(item.rarity // 1.5) + 5) == 1:
+                    return item
+
+        return None
+
+    def old_yield(pickaxe: str):
+        yield_ = d.mining.yields_pickaxes[pickaxe]
+        return random.choice([True] * yield_[0] + [False] * yield_[1])
+
+    assert_same_distribution((lambda: old_mine(False)), (lambda: d.mining.draw_findable(False)))
+    assert_same_distribution((lambda: old_mine(True)), (lambda: d.mining.draw_findable(True)))
+    assert_same_distribution(
+        (lambda: old_until_found(d.mining.findables)), d.mining.draw_present, SLOW_DRAWS
+    )
+    assert_same_distribution(old_barrel, d.mining.draw_barrel, SLOW_DRAWS)
+    assert_same_distribution(
+        (lambda: old_until_found(d.fishing.findables)), d.fishing.draw_findable, SLOW_DRAWS
+    )
+    assert_same_distribution(
+        (lambda: random.choices(d.fishing.fish_ids, d.fishing.fishing_weights)[0]),
+        d.fishing.draw_fish,
+    )
+
+    for pickaxe in d.mining.pickaxes:
+        assert_same_distribution(
+            (lambda: old_yield(pickaxe)), (lambda: d.mining.draw_yield(pickaxe))
+        )
@@ -0,0 +1,118 @@
+import random
+
+from karen.utils.leaderboards import LeaderboardIndex, _FenwickTree
+
+
+def reference(amounts: dict[int, int]) -> list[tuple[int, int]]:
+    # amount descending, then user id ascending, users without a positive amount aren't ranked
+    return sorted(
+        ((user_id, amount) for user_id, amount in amounts.items() if amount > 0),
+        key=(lambda e: (-e[1], e[0])),
+    )
+
+
+def assert_matches(index: LeaderboardIndex, amounts: dict[int, int]) -> None:
+    expected = reference(amounts)
+
+    assert list(index.top(len(expected) + 5)) == expected
+    assert list(index.top(3)) == expected[:3]
+    assert len(index) == len(expected)
+
+    ranks = {user_id: i + 1 for i, (user_id, _) in enumerate(expected)}
+
+    for user_id, amount in amounts.items():
+        assert index.rank(user_id) == ranks.get(user_id)
+        assert index.get(user_id) == (amount if user_id in ranks else 0)
+
+
+def test_fenwick_tree():
+    values = [3, 0, 5, 1, 2]
+    tree = _FenwickTree(values)
+
+    tree.add(2, -4)
+    values[2] -= 4
+
+    assert [tree.prefix_sum(i) for i in range(len(values) + 1)] == [
+        sum(values[:i]) for i in range(len(values) + 1)
+    ]
+
+
+def test_ties():
+    amounts = {5: 10, 3: 10, 9: 10, 1: 20, 7: 0, 2: -3}
+    index = LeaderboardIndex(amounts.items(), bucket_size=2)
+
+    assert list(index.top(10)) == [(1, 20), (3, 10), (5, 10), (9, 10)]
+    assert index.rank(7) is None and index.rank(2) is None
+    assert_matches(index, amounts)
+
+
+def test_set_and_discard():
+    amounts = {i: i % 7 for i in range(1, 30)}
+    index = LeaderboardIndex(amounts.items(), bucket_size=4)
+
+    for user_id, amount in [(3, 100), (3, 1), (50, 6), (2, 0), (8, -1)]:  # update, insert, remove
+        index.set(user_id, amount)
+        amounts[user_id] = amount
+        assert_matches(index, amounts)
+
+    index.discard(50)
+    amounts[50] = 0
+    assert_matches(index, amounts)
+
+    assert index.add(4, 10) == amounts[4] + 10
+    amounts[4] += 10
+    assert_matches(index, amounts)
+
+
+def test_bucket_splits():
+    index = LeaderboardIndex(bucket_size=2)
+    amounts = {}
+
+    # inserting many entries at the top of the board splits the first bucket over and over
+    for user_id in range(1, 40):
+        index.set(user_id, user_id * 3)
+        amounts[user_id] = user_id * 3
+
+    assert len(index._buckets) > 5
+    assert_matches(index, amounts)
+
+
+def test_removing_last_key_of_bucket():
+    amounts = {1: 30, 2: 20, 3: 10}
+    index = LeaderboardIndex(amounts.items(), bucket_size=1)
+
+    assert len(index._buckets) == 3
+
+    index.discard(2)  # empties the middle bucket
+    amounts[2] = 0
+    assert len(index._buckets) == 2
+    assert_matches(index, amounts)
+
+    for user_id in (1, 3):
+        index.discard(user_id)
+        amounts[user_id] = 0
+
+    assert not index._buckets
+    assert_matches(index, amounts)
+
+    index.set(4, 5)  # works after being emptied
+    amounts[4] = 5
+    assert_matches(index, amounts)
+
+
+def test_random_operations():
+    random.seed(0)
+    amounts = {i: random.randint(0, 50) for i in range(200)}
+    index = LeaderboardIndex(amounts.items(), bucket_size=8)
+
+    for _ in range(2_000):
+        user_id = random.randrange(250)
+
+        if random.random() < 0.2:
+            index.discard(user_id)
+            amounts[user_id] = 0
+        else:
+            amounts[user_id] = random.randint(-5, 60)
+            index.set(user_id, amounts[user_id])
+
+    assert_matches(index, amounts)
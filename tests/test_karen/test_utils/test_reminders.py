@@ -0,0 +1,34 @@
+import asyncio
+import datetime
+import logging
+
+from karen.utils.reminders import ReminderScheduler
+
+
+def test_failed_reminders_are_retried():
+    calls = list[list[int]]()
+
+    async def callback(reminders):
+        calls.append([r["id"] for r in reminders])
+
+        # the first delivery fails, the retry succeeds
+        return reminders if len(calls) == 1 else []
+
+    async def main():
+        scheduler = ReminderScheduler(
+            callback, horizon=60, logger=logging.getLogger("test"), retry_delay=0.05
+        )
+        scheduler.start()
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        scheduler.push({"id": 1, "at": now})
+
+        await asyncio.sleep(0.02)
+        assert not scheduler.push({"id": 1, "at": now})  # already scheduled to be retried
+
+        await asyncio.sleep(0.2)
+        scheduler.stop()
+
+    asyncio.run(main())
+
+    assert calls == [[1], [1]]